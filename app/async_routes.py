@@ -0,0 +1,62 @@
+import inspect
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from app.database import get_async_db, get_db
+from app.replicas import get_async_read_db, get_read_db
+
+# Async counterpart of each sync session dependency
+ASYNC_DEPENDENCIES = {get_db: get_async_db, get_read_db: get_async_read_db}
+
+def _run_in_async_session(endpoint):
+    """
+    Wrap a sync endpoint that takes ``db: Session`` into an async endpoint.
+    The original code runs through AsyncSession.run_sync, so every query goes
+    over the async engine without occupying a threadpool worker.
+    """
+    signature = inspect.signature(endpoint)
+    parameters = [
+        parameter.replace(default=Depends(ASYNC_DEPENDENCIES[parameter.default.dependency]))
+        if parameter.name == "db" else parameter
+        for parameter in signature.parameters.values()
+    ]
+
+    async def endpoint_in_async_session(**kwargs):
+        db = kwargs.pop("db")
+        return await db.run_sync(lambda session: endpoint(**kwargs, db=session))
+
+    endpoint_in_async_session.__name__ = endpoint.__name__
+    endpoint_in_async_session.__doc__ = endpoint.__doc__
+    endpoint_in_async_session.__signature__ = signature.replace(parameters=parameters)
+    return endpoint_in_async_session
+
+def make_async_router(router: APIRouter) -> APIRouter:
+    """
+    Build a copy of a router whose database-backed routes run on the async stack.
+    Paths, response models, dependencies and therefore the OpenAPI schema are unchanged.
+    """
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+
+        endpoint = route.endpoint
+        if "db" in inspect.signature(endpoint).parameters:
+            endpoint = _run_in_async_session(endpoint)
+
+        async_router.add_api_route(
+            route.path,
+            endpoint,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            methods=route.methods,
+            operation_id=route.operation_id,
+            name=route.name,
+        )
+    return async_router
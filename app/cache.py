@@ -0,0 +1,269 @@
+import bisect
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from app import models
+from app.changes import on_orgs_committed
+from app.config import settings
+from app.hierarchy import walk_chain
+
+# Plain row type for cached employees; attribute access matches models.Employee
+EmployeeRow = namedtuple("EmployeeRow", ["id", "name", "title", "manager_id", "org_id"])
+
+# Rough fixed cost of one cached employee (row tuple, ints, dict and list slots)
+_ROW_OVERHEAD_BYTES = 200
+
+# Seconds an org found too large to cache is served from the database before another load is tried
+OVERSIZED_RETRY_SECONDS = 300.0
+
+class OrgSnapshot:
+    """Immutable in-memory copy of one org's employees and adjacency structure"""
+    __slots__ = ("org_id", "version", "ids", "employees", "reports", "size", "loaded_at")
+
+    def __init__(self, org_id: int, version: Optional[int], rows: List[EmployeeRow]):
+        self.org_id = org_id
+        # Org version read before the rows, so the rows are at least this new
+        self.version = version
+        # Rows arrive ordered by id, which keeps keyset paging a bisect away
+        self.ids = [row.id for row in rows]
+        self.employees = {row.id: row for row in rows}
+        self.reports: Dict[int, List[int]] = {}
+        size = sys.getsizeof(self.ids) + sys.getsizeof(self.employees)
+        for row in rows:
+            if row.manager_id is not None:
+                self.reports.setdefault(row.manager_id, []).append(row.id)
+            size += _ROW_OVERHEAD_BYTES + sys.getsizeof(row.name) + sys.getsizeof(row.title)
+        self.size = size
+        self.loaded_at = time.monotonic()
+
+    def page(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[EmployeeRow]:
+        start = bisect.bisect_right(self.ids, after_id) if after_id is not None else 0
+        end = start + limit if limit is not None else len(self.ids)
+        return [self.employees[employee_id] for employee_id in self.ids[start:end]]
+
+    def direct_reports(self, employee_id: int) -> List[EmployeeRow]:
+        return [self.employees[report_id] for report_id in self.reports.get(employee_id, [])]
+
+    def chain(self, employee_id: int, include_self: bool = False) -> List[EmployeeRow]:
+        return walk_chain(self.employees, employee_id, include_self)
+
+class OrgCacheBackend:
+    """
+    Storage interface for org snapshots. The local LRU backend below is the
+    default; a shared store (e.g. Redis) can implement the same methods.
+    """
+
+    def get(self, org_id: int) -> Optional[OrgSnapshot]:
+        raise NotImplementedError
+
+    def set(self, org_id: int, snapshot: OrgSnapshot) -> bool:
+        """Store a snapshot; returns False if it is too large to ever be stored"""
+        raise NotImplementedError
+
+    def delete(self, org_id: int):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+class LocalLRUBackend(OrgCacheBackend):
+    """In-process LRU store bounded by entry count and estimated memory"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, OrgSnapshot]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, org_id: int) -> Optional[OrgSnapshot]:
+        with self._lock:
+            snapshot = self._entries.get(org_id)
+            if snapshot is not None:
+                self._entries.move_to_end(org_id)
+            return snapshot
+
+    def set(self, org_id: int, snapshot: OrgSnapshot) -> bool:
+        if snapshot.size > self.max_bytes:
+            # Never let one huge org flush everything else
+            return False
+        with self._lock:
+            previous = self._entries.pop(org_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[org_id] = snapshot
+            self._bytes += snapshot.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+        return True
+
+    def delete(self, org_id: int):
+        with self._lock:
+            snapshot = self._entries.pop(org_id, None)
+            if snapshot is not None:
+                self._bytes -= snapshot.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+class OrgCache:
+    """Read-through cache of org snapshots, invalidated when org changes commit"""
+
+    def __init__(self, backend: OrgCacheBackend, enabled: bool = True, ttl: float = 30.0):
+        self.backend = backend
+        self.enabled = enabled
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on invalidation so a load that raced with a commit is not stored
+        self._generations: Dict[int, int] = {}
+        # org id -> monotonic time its snapshot turned out too large for the backend
+        self._oversized: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, org_id: int, version: Optional[int]) -> Optional[OrgSnapshot]:
+        snapshot = self.backend.get(org_id)
+        # The TTL bounds staleness when other worker processes write to the same org
+        if (
+            snapshot is not None
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+            and (version is None or snapshot.version == version)
+        ):
+            with self._lock:
+                self.hits += 1
+            return snapshot
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def peek_snapshot(self, org_id: int) -> Optional[OrgSnapshot]:
+        """
+        Return the org's snapshot only if it is already cached. Point reads use this:
+        loading every employee of an org to answer for one of them costs more than the query.
+        """
+        if not self.enabled:
+            return None
+        return self._cached(org_id, None)
+
+    def get_snapshot(self, db: Session, org_id: int, version: Optional[int] = None) -> Optional[OrgSnapshot]:
+        """
+        Return the org's snapshot, loading it with one column query on a miss.
+        Pass the org ``version`` a response is labelled with (e.g. its ETag) to get a
+        snapshot of exactly that version; a cached snapshot of any other version is reloaded.
+        Returns None without loading for orgs recently found too large to cache.
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = self._cached(org_id, version)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            oversized_at = self._oversized.get(org_id)
+            if oversized_at is not None:
+                if time.monotonic() - oversized_at < OVERSIZED_RETRY_SECONDS:
+                    return None
+                del self._oversized[org_id]
+            generation = self._generations.get(org_id, 0)
+
+        if version is None:
+            version = db.execute(
+                select(models.OrgChart.version).where(models.OrgChart.id == org_id)
+            ).scalar_one_or_none()
+        # Read after the version: a concurrent commit can make the rows newer than it, never older
+        rows = db.execute(
+            select(*models.EMPLOYEE_COLUMNS)
+            .where(models.Employee.org_id == org_id)
+            .order_by(models.Employee.id)
+        ).all()
+        snapshot = OrgSnapshot(org_id, version, [EmployeeRow(*row) for row in rows])
+
+        with self._lock:
+            if self._generations.get(org_id, 0) == generation and not self.backend.set(org_id, snapshot):
+                self._oversized[org_id] = time.monotonic()
+        return snapshot
+
+    def invalidate(self, org_id: int):
+        with self._lock:
+            self._generations[org_id] = self._generations.get(org_id, 0) + 1
+            self.invalidations += 1
+            self.backend.delete(org_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "oversized_orgs": len(self._oversized),
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+class VersionedCache:
+    """
+    Small LRU for results derived from a whole org, keyed by the org's version.
+    A new version simply misses, so entries never need invalidating.
+    """
+
+    def __init__(self, max_entries: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: tuple, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+org_cache = OrgCache(
+    LocalLRUBackend(max_entries=settings.org_cache_max_orgs, max_bytes=settings.org_cache_max_bytes),
+    enabled=settings.org_cache_enabled,
+    ttl=settings.org_cache_ttl,
+)
+
+# Org statistics keyed by (org_id, version)
+stats_cache = VersionedCache(max_entries=settings.org_cache_max_orgs, enabled=settings.org_cache_enabled)
+
+@on_orgs_committed
+def _invalidate_committed_orgs(org_ids):
+    for org_id in org_ids:
+        org_cache.invalidate(org_id)
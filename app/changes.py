@@ -0,0 +1,137 @@
+from sqlalchemy import event, func, insert, literal, null, select, update
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app import models
+
+# Most ids copied into the change feed by one INSERT ... SELECT
+CHANGE_LOG_BATCH_SIZE = 1000
+
+# PostgreSQL advisory lock key held by a transaction from appending its change feed
+# entries until it commits, so sequence numbers become visible in order
+CHANGE_LOG_LOCK_KEY = 0x6f72676368616e67  # "orgchang"
+
+# Callbacks run once a transaction commits, with each changed org id mapped to its
+# new version (None when the org was deleted)
+_commit_hooks: List[Callable[[Dict[int, Optional[int]]], None]] = []
+
+# Callbacks run with the change feed entries (dicts shaped like schemas.OrgChange) a transaction committed
+_change_hooks: List[Callable[[List[dict]], None]] = []
+
+def on_orgs_committed(func: Callable[[Dict[int, Optional[int]]], None]):
+    """Register a callback for org changes that have been committed"""
+    _commit_hooks.append(func)
+    return func
+
+def on_changes_committed(func: Callable[[List[dict]], None]):
+    """Register a callback for change feed entries that have been committed"""
+    _change_hooks.append(func)
+    return func
+
+def record_org_change(db: Session, org_id: int):
+    """
+    Note that the current transaction modifies an org chart or its employees
+    and bump the org's version. Every mutating route calls this before committing.
+    """
+    changed_org_ids: Dict[int, Optional[int]] = db.info.setdefault("changed_org_ids", {})
+    if org_id in changed_org_ids:
+        return
+    changed_org_ids[org_id] = db.execute(
+        update(models.OrgChart)
+        .where(models.OrgChart.id == org_id)
+        .values(version=models.OrgChart.version + 1)
+        .returning(models.OrgChart.version)
+    ).scalar_one_or_none()
+
+def record_employee_changes(db: Session, org_id: int, employee_ids: Iterable[int], deleted: bool = False):
+    """
+    Queue change feed entries for employees this transaction creates, updates or deletes.
+    Entries are written just before the commit, so upserts carry the committed state.
+    """
+    _queue_changes(db, "employee", org_id, employee_ids, deleted)
+
+def record_org_chart_change(db: Session, org_id: int, deleted: bool = False):
+    """Queue a change feed entry for an org chart created, renamed or deleted in this transaction"""
+    _queue_changes(db, "org_chart", org_id, [org_id], deleted)
+
+def _queue_changes(db: Session, entity: str, org_id: int, entity_ids: Iterable[int], deleted: bool):
+    # Keyed by row, so a row written several times gets one entry with its final state
+    pending: Dict[Tuple[str, int], Tuple[int, bool]] = db.info.setdefault("pending_changes", {})
+    for entity_id in entity_ids:
+        pending[(entity, entity_id)] = (org_id, deleted)
+
+def write_change_log(db: Session, pending: Dict[Tuple[str, int], Tuple[int, bool]]) -> List[dict]:
+    """
+    Append queued changes to the feed: upserts are copied from the current rows, deletes only name the row.
+    Returns the written entries.
+    """
+    changes = models.OrgChange.__table__
+    org_charts = models.OrgChart.__table__
+    employees = models.Employee.__table__
+    
+    upserts: Dict[str, List[int]] = {"org_chart": [], "employee": []}
+    deletes = []
+    for (entity, entity_id), (org_id, deleted) in pending.items():
+        if deleted:
+            deletes.append({"org_id": org_id, "entity": entity, "entity_id": entity_id, "action": "delete"})
+        else:
+            upserts[entity].append(entity_id)
+    
+    columns = ["org_id", "entity", "entity_id", "action", "name", "title", "manager_id"]
+    sources = [
+        (org_charts, upserts["org_chart"], select(
+            org_charts.c.id, literal("org_chart"), org_charts.c.id, literal("upsert"), org_charts.c.name, null(), null()
+        )),
+        (employees, upserts["employee"], select(
+            employees.c.org_id, literal("employee"), employees.c.id, literal("upsert"),
+            employees.c.name, employees.c.title, employees.c.manager_id
+        )),
+    ]
+    entries = []
+    for table, ids, source in sources:
+        for start in range(0, len(ids), CHANGE_LOG_BATCH_SIZE):
+            batch = ids[start:start + CHANGE_LOG_BATCH_SIZE]
+            entries += db.execute(
+                insert(changes)
+                .from_select(columns, source.where(table.c.id.in_(batch)).order_by(table.c.id))
+                .returning(*changes.c)
+            ).all()
+    if deletes:
+        entries += db.execute(insert(changes).returning(*changes.c, sort_by_parameter_order=True), deletes).all()
+    return [entry._asdict() for entry in entries]
+
+def select_changes(since: int, limit: int, org_id: Optional[int] = None):
+    """Change feed entries after sequence number ``since``, oldest first, optionally for one org"""
+    changes = models.OrgChange.__table__
+    statement = select(*changes.c).where(changes.c.seq > since)
+    if org_id is not None:
+        statement = statement.where(changes.c.org_id == org_id)
+    return statement.order_by(changes.c.seq).limit(limit)
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_changes(session):
+    pending = session.info.pop("pending_changes", None)
+    if pending:
+        # Flush first so upserts copy the state being committed
+        session.flush()
+        if session.get_bind().dialect.name == "postgresql":
+            # Serialize appends: otherwise a later seq could commit first, and a reader storing
+            # it as its cursor would never see the earlier one. SQLite already has one writer.
+            session.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_KEY)))
+        session.info["committed_changes"] = write_change_log(session, pending)
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed_changes(session):
+    org_ids = session.info.pop("changed_org_ids", None)
+    if org_ids:
+        for hook in _commit_hooks:
+            hook(org_ids)
+    entries = session.info.pop("committed_changes", None)
+    if entries:
+        for hook in _change_hooks:
+            hook(entries)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop("changed_org_ids", None)
+    session.info.pop("pending_changes", None)
+    session.info.pop("committed_changes", None)
@@ -0,0 +1,35 @@
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+from app import models
+
+def org_etag(org_id: int, version: int) -> str:
+    return f'"org-{org_id}-v{version}"'
+
+def get_org_version(db: Session, org_id: int) -> Optional[int]:
+    """Current version of an org, or None if the org does not exist"""
+    return db.execute(
+        select(models.OrgChart.version).where(models.OrgChart.id == org_id)
+    ).scalar_one_or_none()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in [candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates]
+
+def conditional_response(request: Request, response: Response, etag: Optional[str]) -> Optional[Response]:
+    """
+    Attach the ETag to the response and return a 304 response when the
+    client's If-None-Match already matches it.
+    """
+    if etag is None:
+        return None
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from app.changes import on_changes_committed
+from app.config import settings
+
+class Subscription:
+    """
+    One listener's bounded queue of committed change batches for an org.
+    Lives on the event loop that created it; deliver() must run on that loop.
+    """
+
+    def __init__(self, org_id: int, max_pending: int):
+        self.org_id = org_id
+        self.loop = asyncio.get_running_loop()
+        self.overflows = 0
+        # Set when batches were dropped; the reader must catch up from the change feed
+        self.lagging = False
+        self._queue: "asyncio.Queue[Optional[List[dict]]]" = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, entries: List[dict]):
+        if self.lagging:
+            return
+        try:
+            self._queue.put_nowait(entries)
+        except asyncio.QueueFull:
+            # Backpressure: a slow reader never holds more than max_pending batches.
+            # Drop them all and wake the reader with None so it re-reads the feed instead
+            self.lagging = True
+            self.overflows += 1
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[List[dict]]:
+        """The next batch of entries, or None after an overflow"""
+        return await self._queue.get()
+
+    def resume(self):
+        """Accept batches again after an overflow; call before re-reading the feed"""
+        self.lagging = False
+
+class EventBroker:
+    """
+    Fans committed change feed entries out to subscribers by org. The local broker
+    below only reaches this process; a shared broker (e.g. Redis pub/sub or PostgreSQL
+    LISTEN/NOTIFY) can implement the same methods to reach every worker.
+    """
+
+    def publish(self, org_id: int, entries: List[dict]):
+        raise NotImplementedError
+
+    def subscribe(self, org_id: int) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+class LocalBroker(EventBroker):
+    """In-process broker; publishing is safe from any thread"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.published = 0
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, org_id: int, entries: List[dict]):
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._subscribers.get(org_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, entries)
+            except RuntimeError:
+                # The subscriber's event loop has closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, org_id: int) -> Subscription:
+        subscription = Subscription(org_id, self.max_pending)
+        with self._lock:
+            self._subscribers[org_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.org_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.org_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscriptions = [subscription for subscribers in self._subscribers.values() for subscription in subscribers]
+            return {
+                "orgs": len(self._subscribers),
+                "subscribers": len(subscriptions),
+                "published": self.published,
+                "overflows": sum(subscription.overflows for subscription in subscriptions),
+                "max_pending": self.max_pending,
+            }
+
+broker: EventBroker = LocalBroker(max_pending=settings.event_queue_size)
+
+@on_changes_committed
+def _publish_committed_changes(entries):
+    by_org: Dict[int, List[dict]] = defaultdict(list)
+    for entry in sorted(entries, key=lambda entry: entry["seq"]):
+        by_org[entry["org_id"]].append(entry)
+    for org_id, org_entries in by_org.items():
+        broker.publish(org_id, org_entries)
@@ -0,0 +1,71 @@
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, aliased
+from typing import Optional
+from app import models
+from app.search import starts_with
+
+# Sort keys accepted by list_employees; each is backed by an index led by org_id
+EMPLOYEE_SORT_KEYS = {
+    "id": lambda employee: employee.id,
+    "name": lambda employee: func.lower(employee.name),
+    "title": lambda employee: func.lower(employee.title),
+    "depth": lambda employee: employee.depth,
+}
+
+# Value of the ``sort`` query parameter: a key, optionally prefixed with "-" for descending
+EMPLOYEE_SORT_PATTERN = "^-?(" + "|".join(EMPLOYEE_SORT_KEYS) + ")$"
+
+def select_employees(
+    db: Session,
+    org_id: int,
+    title: Optional[str] = None,
+    manager_id: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    has_reports: Optional[bool] = None,
+    min_depth: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    sort: str = "id",
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Build a column select of an org's employees with every filter and the sort
+    expressed as SQL predicates. ``after_id`` is a keyset cursor for any sort:
+    the sort value of the cursor employee is looked up within the same statement.
+    """
+    employee = models.Employee
+    filters = [employee.org_id == org_id]
+    if title is not None:
+        filters.append(func.lower(employee.title) == title.lower())
+    if manager_id is not None:
+        filters.append(employee.manager_id == manager_id)
+    if name_prefix:
+        filters.append(starts_with(func.lower(employee.name), name_prefix.lower(), db.get_bind().dialect.name))
+    if has_reports is not None:
+        report = aliased(models.Employee)
+        reports_exist = select(report.id).where(report.manager_id == employee.id).exists()
+        filters.append(reports_exist if has_reports else ~reports_exist)
+    # Depth is NULL until the hierarchy paths are built, so these filters then match nobody
+    if min_depth is not None:
+        filters.append(employee.depth >= min_depth)
+    if max_depth is not None:
+        filters.append(employee.depth <= max_depth)
+    
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    sort_value = EMPLOYEE_SORT_KEYS[key]
+    
+    if key == "id":
+        order = [employee.id.desc() if descending else employee.id]
+        position, cursor = employee.id, after_id
+    else:
+        # id breaks ties in the same direction, so (sort value, id) pairs order the rows
+        order = [sort_value(employee).desc(), employee.id.desc()] if descending else [sort_value(employee), employee.id]
+        cursor_employee = aliased(models.Employee)
+        cursor_value = select(sort_value(cursor_employee)).where(cursor_employee.id == after_id).scalar_subquery()
+        position, cursor = tuple_(sort_value(employee), employee.id), tuple_(cursor_value, after_id)
+    
+    if after_id is not None:
+        filters.append(position < cursor if descending else position > cursor)
+    
+    return select(*models.EMPLOYEE_COLUMNS).where(*filters).order_by(*order).limit(limit)
@@ -0,0 +1,503 @@
+from sqlalchemy import String, Text, case, cast, func, literal, select, true, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from app import models
+
+def parse_path(path: str) -> List[int]:
+    """Split a materialized path like "/1/5/23/" into [1, 5, 23] (CEO first)"""
+    return [int(part) for part in path.strip("/").split("/")]
+
+def get_manager_links(db: Session, employee_id: int) -> Dict[int, Optional[int]]:
+    """
+    Load the management chain above an employee (inclusive) with a single
+    recursive query. Returns a mapping of employee id -> manager id.
+
+    UNION (rather than UNION ALL) makes the recursion stop on repeated rows,
+    so a corrupted hierarchy that already contains a loop cannot recurse forever.
+    """
+    chain = (
+        select(models.Employee.id, models.Employee.manager_id)
+        .where(models.Employee.id == employee_id)
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union(
+        select(models.Employee.id, models.Employee.manager_id)
+        .join(chain, models.Employee.id == chain.c.manager_id)
+    )
+    return {row.id: row.manager_id for row in db.execute(select(chain.c.id, chain.c.manager_id))}
+
+def get_ancestor_ids(db: Session, employee_id: int) -> List[int]:
+    """Return the ids of everyone above an employee, nearest manager first"""
+    # Indexed lookup when the materialized path is available
+    path = db.execute(select(models.Employee.path).where(models.Employee.id == employee_id)).scalar()
+    if path:
+        return parse_path(path)[-2::-1]
+    
+    # Fall back to walking manager_id for rows that have not been backfilled yet
+    links = get_manager_links(db, employee_id)
+    ancestors = []
+    seen = {employee_id}
+    current = links.get(employee_id)
+    # Walk the in-memory links iteratively so deep chains never touch the recursion limit
+    while current is not None and current not in seen:
+        ancestors.append(current)
+        seen.add(current)
+        current = links.get(current)
+    return ancestors
+
+def walk_chain(employees: Mapping, employee_id: int, include_self: bool = False) -> List:
+    """
+    Follow manager_id upwards through ``employees`` (id -> row) and return the
+    rows of everyone above ``employee_id``, nearest manager first. With
+    ``include_self`` the employee's own row comes first.
+    """
+    chain = [employees[employee_id]] if include_self else []
+    seen = {employee_id}
+    current = employees[employee_id].manager_id
+    while current is not None and current not in seen and current in employees:
+        chain.append(employees[current])
+        seen.add(current)
+        current = employees[current].manager_id
+    return chain
+
+def get_chain_rows(
+    db: Session,
+    org_id: int,
+    employee_ids: Sequence[int],
+    include_self: bool = False
+) -> Dict[int, List]:
+    """
+    Load the management chains of many employees with a single recursive query.
+    Returns a mapping of employee id -> rows of their managers, nearest first,
+    for the requested employees that exist in the org. Ancestors shared by
+    several employees are fetched once, and UNION stops on repeated rows.
+    """
+    chain = (
+        select(*models.EMPLOYEE_COLUMNS)
+        .where(models.Employee.id.in_(employee_ids), models.Employee.org_id == org_id)
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union(
+        select(*models.EMPLOYEE_COLUMNS).join(chain, models.Employee.id == chain.c.manager_id)
+    )
+    employees = {row.id: row for row in db.execute(select(chain))}
+    return {
+        employee_id: walk_chain(employees, employee_id, include_self)
+        for employee_id in employee_ids
+        if employee_id in employees
+    }
+
+def lowest_common_manager(lineages: Sequence[List]):
+    """
+    Given each employee's lineage (own row first, then managers up to the CEO),
+    return the lowest row shared by all of them, or None if they have no common
+    manager. An employee who manages all the others is their common manager.
+    """
+    shared = set.intersection(*({row.id for row in lineage} for lineage in lineages))
+    for row in lineages[0]:
+        if row.id in shared:
+            return row
+    return None
+
+def reporting_path(lineage: List, other_lineage: List) -> Optional[Tuple]:
+    """
+    Return (common manager, path) between two employees given their lineages.
+    The path runs from the first employee up to the common manager and down to
+    the other employee, both ends included. None if the two are not connected.
+    """
+    common = lowest_common_manager([lineage, other_lineage])
+    if common is None:
+        return None
+    up = lineage[:[row.id for row in lineage].index(common.id) + 1]
+    down = other_lineage[:[row.id for row in other_lineage].index(common.id)]
+    return common, up + down[::-1]
+
+def is_under(db: Session, employee_id: int, manager_id: int) -> bool:
+    """Whether ``employee_id`` reports to ``manager_id``, directly or through other managers"""
+    return manager_id in get_ancestor_ids(db, employee_id)
+
+def would_create_cycle(db: Session, manager_id: int, subordinate_id: int, ancestors=None) -> bool:
+    """
+    Check if assigning manager_id as manager of subordinate_id would create a cycle.
+    Pass a precomputed ``ancestors`` set of manager_id to reuse it across many checks.
+    """
+    if manager_id == subordinate_id:
+        return True
+    if ancestors is None:
+        return is_under(db, manager_id, subordinate_id)
+    return subordinate_id in ancestors
+
+def _get_subtree_root(db: Session, org_id: int, employee_id: int):
+    """The employee's (org_id, path, depth) if its subtree can be read by path prefix, else None"""
+    root = db.execute(
+        select(models.Employee.org_id, models.Employee.path, models.Employee.depth)
+        .where(models.Employee.id == employee_id)
+    ).first()
+    if root is None or root.path is None or root.org_id != org_id:
+        return None
+    return root
+
+def _subtree_criteria(org_id: int, root) -> tuple:
+    """Criteria matching a root and everyone below it, as a prefix scan of ix_employees_org_id_path"""
+    return models.Employee.org_id == org_id, models.Employee.path.like(f"{root.path}%")
+
+def _subtree_cte(org_id: int, employee_id: int, max_depth: Optional[int] = None):
+    """Recursive walk down manager_id from an employee, for rows without a materialized path"""
+    subtree = (
+        select(
+            models.Employee.id,
+            models.Employee.name,
+            models.Employee.title,
+            models.Employee.manager_id,
+            models.Employee.org_id,
+            literal(0).label("depth"),
+        )
+        .where(models.Employee.id == employee_id)
+        .cte("subtree", recursive=True)
+    )
+    recursive_step = (
+        select(
+            models.Employee.id,
+            models.Employee.name,
+            models.Employee.title,
+            models.Employee.manager_id,
+            models.Employee.org_id,
+            (subtree.c.depth + 1).label("depth"),
+        )
+        .join(subtree, models.Employee.manager_id == subtree.c.id)
+        .where(models.Employee.org_id == org_id)
+    )
+    if max_depth is not None:
+        recursive_step = recursive_step.where(subtree.c.depth < max_depth)
+    return subtree.union_all(recursive_step)
+
+def get_subtree_rows(db: Session, org_id: int, employee_id: int, max_depth: Optional[int] = None):
+    """
+    Fetch an employee and everyone below them as plain rows (id, name, title,
+    manager_id, org_id, depth) ordered by depth, without hydrating Employee objects.
+    ``max_depth`` limits how many levels below the root are included.
+
+    Reads the subtree with an indexed path prefix scan, falling back to a single
+    recursive query when the employee has no materialized path. An employee of
+    another org is returned alone, so callers can tell it apart from a missing one.
+    """
+    root = _get_subtree_root(db, org_id, employee_id)
+    if root is None:
+        subtree = _subtree_cte(org_id, employee_id, max_depth)
+        return db.execute(select(subtree).order_by(subtree.c.depth, subtree.c.id)).all()
+    
+    statement = select(
+        *models.EMPLOYEE_COLUMNS, (models.Employee.depth - root.depth).label("depth")
+    ).where(*_subtree_criteria(org_id, root))
+    if max_depth is not None:
+        statement = statement.where(models.Employee.depth <= root.depth + max_depth)
+    return db.execute(statement.order_by(models.Employee.depth, models.Employee.id)).all()
+
+def count_subtree(db: Session, org_id: int, employee_id: int) -> Optional[int]:
+    """
+    Count an employee and everyone below them with an indexed path prefix scan,
+    or a recursive query when the employee has no materialized path.
+    Returns None if the employee is not in the org.
+    """
+    root = _get_subtree_root(db, org_id, employee_id)
+    if root is not None:
+        return db.execute(select(func.count()).where(*_subtree_criteria(org_id, root))).scalar_one()
+    
+    subtree = _subtree_cte(org_id, employee_id)
+    count = db.execute(
+        select(func.count()).select_from(subtree).where(
+            select(models.Employee.id)
+            .where(models.Employee.id == employee_id, models.Employee.org_id == org_id)
+            .exists()
+        )
+    ).scalar_one()
+    return count or None
+
+# Deepest nesting /tree returns: the response model validates nested reports recursively,
+# and Pydantic's recursion limit fails at around 250 levels
+MAX_TREE_DEPTH = 200
+
+def build_tree(rows) -> Optional[dict]:
+    """
+    Assemble rows from get_subtree_rows into nested dicts shaped like
+    schemas.EmployeeWithReports. Runs in O(n) since parents precede children.
+    """
+    if not rows:
+        return None
+    nodes = {}
+    root = None
+    for row in rows:
+        node = {
+            "id": row.id,
+            "name": row.name,
+            "title": row.title,
+            "manager_id": row.manager_id,
+            "org_id": row.org_id,
+            "direct_reports": [],
+        }
+        nodes[row.id] = node
+        if root is None:
+            root = node
+        else:
+            nodes[row.manager_id]["direct_reports"].append(node)
+    return root
+
+def get_org_stats(db: Session, org_id: int) -> dict:
+    """
+    Headcount, depth distribution, leaf count and span of control for an org,
+    aggregated in the database with two queries (three for an org whose paths are not
+    built yet) and no Employee objects.
+    Returned as a dict shaped like schemas.OrgStats (without org_id/version).
+    """
+    employees = models.Employee.__table__
+    
+    # Headcount per level from the materialized depth (an index-only scan of ix_employees_org_id_depth_id)
+    by_depth = db.execute(
+        select(employees.c.depth, func.count().label("headcount"))
+        .where(employees.c.org_id == org_id)
+        .group_by(employees.c.depth)
+        .order_by(employees.c.depth)
+    ).all()
+    if any(row.depth is None for row in by_depth):
+        by_depth = _count_levels(db, org_id)
+    
+    # One row per manager (plus the NULL group of CEOs), so the total is the headcount
+    by_manager = db.execute(
+        select(employees.c.manager_id, func.count().label("direct_reports"))
+        .where(employees.c.org_id == org_id)
+        .group_by(employees.c.manager_id)
+        .order_by(employees.c.manager_id)
+    ).all()
+    headcount = sum(row.direct_reports for row in by_manager)
+    spans = [
+        {"manager_id": row.manager_id, "direct_reports": row.direct_reports}
+        for row in by_manager
+        if row.manager_id is not None
+    ]
+    
+    return {
+        "headcount": headcount,
+        "max_depth": by_depth[-1].depth if by_depth else None,
+        "leaf_count": headcount - len(spans),
+        "manager_count": len(spans),
+        "average_span_of_control": sum(span["direct_reports"] for span in spans) / len(spans) if spans else 0.0,
+        "max_span_of_control": max((span["direct_reports"] for span in spans), default=0),
+        "headcount_by_depth": [{"depth": row.depth, "headcount": row.headcount} for row in by_depth],
+        "spans": spans,
+    }
+
+def _count_levels(db: Session, org_id: int):
+    """Headcount per level computed from manager_id, for orgs whose paths are not (fully) built"""
+    employees = models.Employee.__table__
+    levels = (
+        select(employees.c.id, literal(0).label("depth"))
+        .where(employees.c.org_id == org_id, employees.c.manager_id.is_(None))
+        .cte("levels", recursive=True)
+    )
+    levels = levels.union_all(
+        select(employees.c.id, levels.c.depth + 1)
+        .join(levels, employees.c.manager_id == levels.c.id)
+        .where(employees.c.org_id == org_id)
+    )
+    return db.execute(
+        select(levels.c.depth, func.count().label("headcount"))
+        .group_by(levels.c.depth)
+        .order_by(levels.c.depth)
+    ).all()
+
+def set_path(employee: models.Employee, manager: Optional[models.Employee]):
+    """Set the materialized path of a newly flushed employee from its manager"""
+    if manager is None:
+        employee.path = f"/{employee.id}/"
+        employee.depth = 0
+    elif manager.path is not None:
+        employee.path = f"{manager.path}{employee.id}/"
+        employee.depth = manager.depth + 1
+
+def _path_anchor(prefix: str, depth: int, *criteria):
+    """Select employees matching ``criteria`` as subtree roots placed at ``prefix`` / ``depth``"""
+    employees = models.Employee.__table__
+    return select(
+        employees.c.id,
+        cast(literal(prefix, String) + cast(employees.c.id, String) + literal("/"), Text).label("path"),
+        literal(depth).label("depth"),
+    ).where(*criteria)
+
+def _write_subtree_paths(db: Session, anchors: List, stop_ids: Sequence[int] = ()):
+    """
+    Write path and depth for the anchor rows and everything below them with one
+    recursive UPDATE that walks down manager_id. The walk does not descend into
+    ``stop_ids``, which must be anchors themselves.
+    """
+    employees = models.Employee.__table__
+    tree = anchors[0].cte("tree", recursive=True)
+    recursive_step = (
+        select(
+            employees.c.id,
+            cast(tree.c.path + cast(employees.c.id, String) + literal("/"), Text),
+            tree.c.depth + 1,
+        )
+        .join(tree, employees.c.manager_id == tree.c.id)
+    )
+    if stop_ids:
+        recursive_step = recursive_step.where(employees.c.id.not_in(stop_ids))
+    # Extra anchors must precede the recursive term
+    tree = tree.union_all(*anchors[1:], recursive_step)
+    db.execute(
+        update(employees)
+        .where(employees.c.id == tree.c.id)
+        .values(path=tree.c.path, depth=tree.c.depth)
+    )
+
+def move_subtrees(
+    db: Session,
+    org_id: int,
+    moves: Iterable[Tuple[models.Employee, Optional[models.Employee]]]
+):
+    """
+    Rewrite the materialized paths for a set of (employee, new_manager) moves
+    with a single statement, however many employees move or how deep their
+    subtrees are. manager_id itself is left to the caller.
+
+    New managers must not lie inside any of the moved subtrees (cycle checks
+    guarantee this); callers needing dependent moves issue them in separate calls.
+    Moved employees may be nested inside each other's subtrees.
+    """
+    employees = models.Employee.__table__
+    by_manager: Dict[Optional[int], List[int]] = {}
+    managers: Dict[Optional[int], Optional[models.Employee]] = {}
+    for employee, manager in moves:
+        if manager is not None and manager.path is None:
+            # Hierarchy index not built for this org yet
+            continue
+        key = manager.id if manager is not None else None
+        by_manager.setdefault(key, []).append(employee.id)
+        managers[key] = manager
+    if not by_manager:
+        return
+    
+    anchors = []
+    for key, employee_ids in by_manager.items():
+        manager = managers[key]
+        prefix = manager.path if manager is not None else "/"
+        depth = manager.depth + 1 if manager is not None else 0
+        anchors.append(_path_anchor(prefix, depth, employees.c.org_id == org_id, employees.c.id.in_(employee_ids)))
+    
+    # Make sure pending ORM changes are written before rewriting rows underneath them
+    db.flush()
+    _write_subtree_paths(db, anchors, [employee_id for ids in by_manager.values() for employee_id in ids])
+    # Loaded employees may now hold stale paths
+    db.expire_all()
+
+def plan_subtree_moves(moves: Mapping[int, int], parents: Mapping[int, Optional[int]]) -> List[List[int]]:
+    """
+    Order subtree moves (employee id -> new manager id) into waves that can each
+    be applied with one move_subtrees call: a move waits while its new manager
+    still sits inside a subtree that has yet to move. ``parents`` holds the
+    current manager of the moved employees and of everyone above the new managers.
+    Raises ValueError with the employee id if the moves would create a cycle.
+    """
+    def ancestors(employee_id: Optional[int], applied: Mapping[int, int]) -> set:
+        # The employee and everyone above them once the ``applied`` moves are done
+        seen = set()
+        while employee_id is not None and employee_id not in seen:
+            seen.add(employee_id)
+            employee_id = applied[employee_id] if employee_id in applied else parents.get(employee_id)
+        return seen
+    
+    for employee_id, manager_id in moves.items():
+        if employee_id in ancestors(manager_id, moves):
+            raise ValueError(employee_id)
+    
+    pending = dict(moves)
+    applied: Dict[int, int] = {}
+    waves = []
+    while pending:
+        wave = [
+            employee_id for employee_id, manager_id in pending.items()
+            if not ancestors(manager_id, applied) & pending.keys()
+        ]
+        if not wave:
+            # Unreachable once the cycle check above has passed
+            raise ValueError(next(iter(pending)))
+        for employee_id in wave:
+            applied[employee_id] = pending.pop(employee_id)
+        waves.append(wave)
+    return waves
+
+def apply_subtree_moves(db: Session, org_id: int, moves: Mapping[int, int], waves: List[List[int]]):
+    """
+    Re-parent employees, with everyone below them, in the waves from plan_subtree_moves.
+    Each wave costs one query to load its rows, one path rewrite and one UPDATE of
+    manager_id, whatever the size or depth of the subtrees.
+    """
+    employees = models.Employee.__table__
+    for wave in waves:
+        wave_moves = {employee_id: moves[employee_id] for employee_id in wave}
+        # Earlier waves expire the session, so reload this wave's employees and managers together
+        loaded = {
+            employee.id: employee
+            for employee in db.query(models.Employee).filter(
+                models.Employee.id.in_(set(wave_moves) | set(wave_moves.values()))
+            )
+        }
+        move_subtrees(db, org_id, [(loaded[employee_id], loaded[manager_id]) for employee_id, manager_id in wave_moves.items()])
+        db.execute(
+            update(employees)
+            .where(employees.c.id.in_(wave))
+            .values(manager_id=case(wave_moves, value=employees.c.id))
+        )
+
+def rebuild_paths(db: Session, org_ids: Optional[Sequence[int]] = None):
+    """
+    Recompute path and depth from manager_id with one recursive query.
+    Rebuilds every org unless ``org_ids`` is given.
+    """
+    employees = models.Employee.__table__
+    org_filter = employees.c.org_id.in_(org_ids) if org_ids is not None else true()
+    
+    # Clear first so rows unreachable from a CEO do not keep stale paths
+    db.execute(update(employees).where(org_filter).values(path=None, depth=None))
+    _write_subtree_paths(db, [_path_anchor("/", 0, employees.c.manager_id.is_(None), org_filter)])
+
+def reparent_reports(
+    db: Session,
+    org_id: int,
+    employee: models.Employee,
+    new_manager: Optional[models.Employee]
+):
+    """
+    Move every direct report of ``employee`` (with their subtrees) under ``new_manager``
+    using one UPDATE for manager_id and one for the hierarchy paths, however many reports there are.
+    Returns the ids of the moved direct reports.
+    """
+    # Write pending ORM changes first so the statements below see them
+    db.flush()
+    employees = models.Employee.__table__
+    report_ids = db.execute(
+        update(employees)
+        .where(employees.c.org_id == org_id, employees.c.manager_id == employee.id)
+        .values(manager_id=new_manager.id if new_manager is not None else None)
+        .returning(employees.c.id)
+    ).scalars().all()
+    
+    if employee.path is not None and (new_manager is None or new_manager.path is not None):
+        new_prefix = new_manager.path if new_manager is not None else "/"
+        depth_delta = (new_manager.depth if new_manager is not None else -1) - employee.depth
+        db.execute(
+            update(employees)
+            .where(
+                employees.c.org_id == org_id,
+                employees.c.path.like(f"{employee.path}%"),
+                employees.c.id != employee.id,
+            )
+            .values(
+                path=literal(new_prefix, String).concat(
+                    func.substr(employees.c.path, len(employee.path) + 1, type_=String)
+                ),
+                depth=employees.c.depth + depth_delta,
+            )
+        )
+    # Loaded reports may now hold stale manager ids and paths
+    db.expire_all()
+    return report_ids
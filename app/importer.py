@@ -0,0 +1,116 @@
+import csv
+import io
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from app import models, schemas
+from app.hierarchy import rebuild_paths
+
+CSV_COLUMNS = ("key", "name", "title", "manager_key", "manager_id")
+
+def parse_csv(content: bytes) -> List[schemas.EmployeeImportRecord]:
+    """Parse an import CSV with a header row of key,name,title,manager_key,manager_id"""
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    missing = {"key", "name", "title"} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    records = []
+    for line_number, row in enumerate(reader, start=2):
+        # Treat empty cells as missing values
+        values = {column: row[column] for column in CSV_COLUMNS if row.get(column)}
+        try:
+            records.append(schemas.EmployeeImportRecord(**values))
+        except ValidationError:
+            raise HTTPException(status_code=400, detail=f"Invalid employee on CSV line {line_number}")
+    return records
+
+def plan_import(db: Session, org_id: int, records: List[schemas.EmployeeImportRecord]) -> List[List[schemas.EmployeeImportRecord]]:
+    """
+    Validate an import entirely in memory and group the records into levels,
+    where every record's manager is either an existing employee or in an earlier level.
+    Requires at most two queries regardless of the number of records.
+    """
+    by_key: Dict[str, schemas.EmployeeImportRecord] = {}
+    for record in records:
+        if record.key in by_key:
+            raise HTTPException(status_code=400, detail=f"Duplicate employee key '{record.key}'")
+        by_key[record.key] = record
+
+    roots = []
+    children: Dict[str, List[schemas.EmployeeImportRecord]] = {}
+    existing_manager_ids = set()
+    for record in records:
+        if record.manager_key is not None and record.manager_id is not None:
+            raise HTTPException(status_code=400, detail=f"Employee '{record.key}' cannot have both manager_key and manager_id")
+        if record.manager_key is not None:
+            if record.manager_key not in by_key:
+                raise HTTPException(status_code=400, detail=f"Unknown manager_key '{record.manager_key}' for employee '{record.key}'")
+            children.setdefault(record.manager_key, []).append(record)
+        else:
+            if record.manager_id is not None:
+                existing_manager_ids.add(record.manager_id)
+            roots.append(record)
+
+    # Existing managers must exist and belong to the same org (one query for all of them)
+    if existing_manager_ids:
+        manager_orgs = dict(db.execute(
+            select(models.Employee.id, models.Employee.org_id).where(models.Employee.id.in_(existing_manager_ids))
+        ).all())
+        for manager_id in existing_manager_ids:
+            if manager_id not in manager_orgs:
+                raise HTTPException(status_code=404, detail=f"Manager {manager_id} not found")
+            if manager_orgs[manager_id] != org_id:
+                raise HTTPException(status_code=400, detail="Manager must belong to the same organization")
+
+    # The organization must end up with exactly one CEO
+    new_ceos = sum(1 for record in roots if record.manager_id is None)
+    has_ceo = db.query(models.Employee.id).filter(
+        models.Employee.org_id == org_id,
+        models.Employee.manager_id.is_(None)
+    ).first() is not None
+    if new_ceos + (1 if has_ceo else 0) != 1:
+        raise HTTPException(status_code=400, detail="Organization must have exactly one CEO")
+
+    # Breadth-first levels; anything never reached sits on a manager_key cycle
+    levels = []
+    level = roots
+    planned = 0
+    while level:
+        levels.append(level)
+        planned += len(level)
+        level = [child for record in level for child in children.get(record.key, [])]
+    if planned != len(records):
+        raise HTTPException(status_code=400, detail="Import would create a cycle in the reporting hierarchy")
+    return levels
+
+def write_import(db: Session, org_id: int, levels: List[List[schemas.EmployeeImportRecord]]) -> Dict[str, int]:
+    """
+    Insert planned levels with multi-row INSERT ... RETURNING (one statement per
+    batch of rows rather than per employee), then build hierarchy paths for the org.
+    Does not commit.
+    """
+    employees = models.Employee.__table__
+    statement = insert(employees).returning(employees.c.id, sort_by_parameter_order=True)
+    ids: Dict[str, int] = {}
+    for level in levels:
+        rows = [
+            {
+                "name": record.name,
+                "title": record.title,
+                "org_id": org_id,
+                "manager_id": ids[record.manager_key] if record.manager_key is not None else record.manager_id,
+            }
+            for record in level
+        ]
+        new_ids = db.execute(statement, rows).scalars().all()
+        ids.update(zip((record.key for record in level), new_ids))
+
+    rebuild_paths(db, [org_id])
+    return ids
@@ -0,0 +1,148 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class DbStats:
+    """Process-wide counters for pool checkouts and executed queries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.requests = 0
+            self.queries = 0
+            self.query_time_total = 0.0
+            self.max_queries_per_request = 0
+
+    def record_checkout(self, wait: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_timeouts += timed_out
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def record_query(self, elapsed: float):
+        with self._lock:
+            self.queries += 1
+            self.query_time_total += elapsed
+
+    def record_request(self, request_stats: "RequestDbStats"):
+        with self._lock:
+            self.requests += 1
+            self.max_queries_per_request = max(self.max_queries_per_request, request_stats.query_count)
+
+db_stats = DbStats()
+
+class RequestDbStats:
+    """Queries issued while handling a single request"""
+    __slots__ = ("query_count", "query_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+
+_request_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+def start_request_stats() -> RequestDbStats:
+    """Begin collecting query stats for the current request"""
+    stats = RequestDbStats()
+    _request_stats.set(stats)
+    return stats
+
+def finish_request_stats(stats: RequestDbStats):
+    db_stats.record_request(stats)
+
+class _CheckoutTimingMixin:
+    """Measures how long each connection checkout waits on the pool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            db_stats.record_checkout(time.perf_counter() - start, timed_out)
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def instrument_engine(engine):
+    """Count and time every statement executed through an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_times"].pop()
+        db_stats.record_query(elapsed)
+        request_stats = _request_stats.get()
+        if request_stats is not None:
+            request_stats.query_count += 1
+            request_stats.query_time += elapsed
+
+def pool_status(engine) -> dict:
+    """Current occupancy of an engine's connection pool"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        # Negative while the base pool is not yet full
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+    }
+
+def snapshot(engine, async_engine=None, replica_engines=(), async_replica_engines=()) -> dict:
+    """Pool occupancy, including any replica pools, plus checkout and per-request query statistics"""
+    with db_stats._lock:
+        checkouts = db_stats.checkouts
+        requests = db_stats.requests
+        stats = {
+            "checkouts": {
+                "count": checkouts,
+                "timeouts": db_stats.checkout_timeouts,
+                "wait_avg_ms": db_stats.checkout_wait_total / checkouts * 1000 if checkouts else 0.0,
+                "wait_max_ms": db_stats.checkout_wait_max * 1000,
+            },
+            "queries": {
+                "count": db_stats.queries,
+                "time_total_ms": db_stats.query_time_total * 1000,
+            },
+            "requests": {
+                "count": requests,
+                "queries_avg": db_stats.queries / requests if requests else 0.0,
+                "queries_max": db_stats.max_queries_per_request,
+                "query_time_avg_ms": db_stats.query_time_total / requests * 1000 if requests else 0.0,
+            },
+        }
+    stats["pool"] = pool_status(engine)
+    if async_engine is not None:
+        stats["async_pool"] = pool_status(async_engine.sync_engine)
+    if replica_engines:
+        stats["replica_pools"] = [pool_status(replica_engine) for replica_engine in replica_engines]
+    if async_replica_engines:
+        stats["async_replica_pools"] = [
+            pool_status(replica_engine.sync_engine) for replica_engine in async_replica_engines
+        ]
+    return stats
@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from typing import Callable, Optional
+from app import models, schemas
+from app.database import SessionLocal
+
+# Finished jobs are kept for status polling this long
+JOB_RETENTION = timedelta(days=1)
+
+# Job state lives in the jobs table, so any worker process can answer a status poll
+# and the status of finished jobs survives restarts
+
+def create_job(db: Session, kind: str) -> schemas.Job:
+    """Register a new pending background job and commit it, so it is visible before the job starts"""
+    jobs = models.Job.__table__
+    db.execute(
+        delete(jobs).where(
+            jobs.c.status.in_(["completed", "failed"]),
+            jobs.c.updated_at < datetime.now(timezone.utc) - JOB_RETENTION,
+        )
+    )
+    job = schemas.Job(id=uuid.uuid4().hex, kind=kind, status="pending")
+    db.execute(insert(jobs).values(**job.model_dump()))
+    db.commit()
+    return job
+
+def get_job(db: Session, job_id: str) -> Optional[schemas.Job]:
+    jobs = models.Job.__table__
+    row = db.execute(
+        select(jobs.c.id, jobs.c.kind, jobs.c.status, jobs.c.detail).where(jobs.c.id == job_id)
+    ).first()
+    return schemas.Job(**row._asdict()) if row is not None else None
+
+def _set_status(job_id: str, status: str, detail: Optional[str] = None):
+    # Own short transaction, so the status is committed whatever the job's session does
+    db = SessionLocal()
+    try:
+        db.execute(update(models.Job).where(models.Job.id == job_id).values(status=status, detail=detail))
+        db.commit()
+    finally:
+        db.close()
+
+def run_job(job_id: str, func: Callable, *args):
+    """Run a job function, recording its progress for the status endpoint"""
+    _set_status(job_id, "running")
+    try:
+        func(*args)
+    except Exception as e:
+        # Failures are reported through the job status rather than the (already sent) response
+        _set_status(job_id, "failed", str(e))
+        return
+    _set_status(job_id, "completed")
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import org_charts, employees, auth
-from app.database import engine, Base
+from app.routers import org_charts, employees, changes, events, auth, jobs, metrics
+from app.database import engine, Base, USE_ASYNC_DB
+from app.async_routes import make_async_router
+from app.instrumentation import finish_request_stats, start_request_stats
 from app.auth import get_optional_current_user
 
 # Create database tables
@@ -22,14 +24,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Report per-request database usage in response headers and /metrics/db
+@app.middleware("http")
+async def track_db_usage(request: Request, call_next):
+    stats = start_request_stats()
+    response = await call_next(request)
+    finish_request_stats(stats)
+    response.headers["X-DB-Query-Count"] = str(stats.query_count)
+    response.headers["X-DB-Query-Time-Ms"] = f"{stats.query_time * 1000:.1f}"
+    return response
+
 # Optional global dependency for authentication
 # This is currently a no-op but enables easy addition of authentication later
 # app.dependency_overrides[get_optional_current_user] = lambda: None
 
-# Include routers
-app.include_router(org_charts.router, prefix="/orgcharts", tags=["org_charts"])
-app.include_router(employees.router, prefix="/orgcharts/{org_id}/employees", tags=["employees"])
+# Include routers (served through an AsyncSession when the async stack is enabled)
+org_charts_router = make_async_router(org_charts.router) if USE_ASYNC_DB else org_charts.router
+employees_router = make_async_router(employees.router) if USE_ASYNC_DB else employees.router
+changes_router = make_async_router(changes.router) if USE_ASYNC_DB else changes.router
+jobs_router = make_async_router(jobs.router) if USE_ASYNC_DB else jobs.router
+app.include_router(org_charts_router, prefix="/orgcharts", tags=["org_charts"])
+app.include_router(employees_router, prefix="/orgcharts/{org_id}/employees", tags=["employees"])
+app.include_router(changes_router, prefix="/changes", tags=["changes"])
+# Long-lived streams hold no database session, so they run on the event loop either way
+app.include_router(events.router, prefix="/orgcharts", tags=["events"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 
 # Create an endpoint for auth status checks (disabled for now)
 @app.get("/auth/status", tags=["auth"])
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, BigInteger, Column, DateTime, Integer, String, ForeignKey, Index, event, func
+from sqlalchemy.orm import backref, relationship
 from app.database import Base
 
 class OrgChart(Base):
@@ -7,8 +7,11 @@ class OrgChart(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
+    # Bumped by every change to the org or its employees; used as the ETag of org reads
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
-    employees = relationship("Employee", back_populates="org_chart", cascade="all, delete-orphan")
+    # Relationships never load implicitly; queries must load what they need explicitly
+    employees = relationship("Employee", back_populates="org_chart", cascade="all, delete-orphan", lazy="raise")
 
 class Employee(Base):
     __tablename__ = "employees"
@@ -18,12 +21,91 @@ class Employee(Base):
     title = Column(String, nullable=False)
     org_id = Column(Integer, ForeignKey("org_charts.id", ondelete="CASCADE"), nullable=False)
     manager_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
+    # Materialized hierarchy path ("/<ceo id>/.../<own id>/") and level below the CEO.
+    # Maintained by app.hierarchy; NULL until scripts/rebuild_hierarchy.py has run.
+    path = Column(String, nullable=True)
+    depth = Column(Integer, nullable=True)
 
-    org_chart = relationship("OrgChart", back_populates="employees")
-    manager = relationship("Employee", remote_side=[id], backref="direct_reports")
+    org_chart = relationship("OrgChart", back_populates="employees", lazy="raise")
+    manager = relationship("Employee", remote_side=[id], backref=backref("direct_reports", lazy="raise"), lazy="raise")
 
     # Add indexes for performance
     __table_args__ = (
-        Index('ix_employees_org_id', 'org_id'),
+        Index('ix_employees_org_id_id', 'org_id', 'id'),
         Index('ix_employees_manager_id', 'manager_id'),
-    )
\ No newline at end of file
+        Index('ix_employees_org_id_path', 'org_id', 'path', postgresql_ops={'path': 'text_pattern_ops'}),
+        Index('ix_employees_org_id_depth_id', 'org_id', 'depth', 'id'),
+        # Trigram indexes behind name/title search (app/search.py), led by org_id (btree_gin) so a
+        # search only visits its own org's matches; SQLite uses the FTS table below
+        Index('ix_employees_org_id_name_trgm', 'org_id', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+            .ddl_if(dialect='postgresql'),
+        Index('ix_employees_org_id_title_trgm', 'org_id', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+            .ddl_if(dialect='postgresql'),
+    )
+
+class OrgChange(Base):
+    """
+    Append-only change feed entry, written in the transaction that made the change (app/changes.py).
+    Upserts carry the row's API fields as committed; deletes only identify the row.
+    """
+    __tablename__ = "org_changes"
+
+    # 64-bit, as the log is never pruned; SQLite only autoincrements INTEGER keys, which are 64-bit there
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # No foreign key: entries outlive the org so consumers see its deletion
+    org_id = Column(Integer, nullable=False)
+    entity = Column(String, nullable=False)  # "org_chart" or "employee"
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # "upsert" or "delete"
+    name = Column(String, nullable=True)
+    title = Column(String, nullable=True)
+    manager_id = Column(Integer, nullable=True)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_org_changes_org_id_seq', 'org_id', 'seq'),
+    )
+
+class Job(Base):
+    """Status of a background job (app/jobs.py), shared by every worker process"""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # "pending", "running", "completed" or "failed"
+    detail = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+# Columns of the Employee API representation, for reads that skip ORM hydration
+EMPLOYEE_COLUMNS = (Employee.id, Employee.name, Employee.title, Employee.manager_id, Employee.org_id)
+
+# Case-insensitive prefix/equality filters and sorting on name and title, and prefix search
+# on queries too short for trigrams
+Index(
+    'ix_employees_org_id_name_lower', Employee.org_id, func.lower(Employee.name).label('name_lower'),
+    postgresql_ops={'name_lower': 'text_pattern_ops'},
+)
+Index(
+    'ix_employees_org_id_title_lower', Employee.org_id, func.lower(Employee.title).label('title_lower'),
+    postgresql_ops={'title_lower': 'text_pattern_ops'},
+)
+
+# SQLite stand-in for the trigram indexes: an FTS5 trigram table kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS employees_search USING fts5("
+    "name, title, content='employees', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS employees_search_insert AFTER INSERT ON employees BEGIN "
+    "INSERT INTO employees_search(rowid, name, title) VALUES (new.id, new.name, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS employees_search_delete AFTER DELETE ON employees BEGIN "
+    "INSERT INTO employees_search(employees_search, rowid, name, title) VALUES ('delete', old.id, old.name, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS employees_search_update AFTER UPDATE OF name, title ON employees BEGIN "
+    "INSERT INTO employees_search(employees_search, rowid, name, title) VALUES ('delete', old.id, old.name, old.title); "
+    "INSERT INTO employees_search(rowid, name, title) VALUES (new.id, new.name, new.title); END",
+]
+
+# pg_trgm for the trigram operator classes, btree_gin for org_id in the same GIN indexes
+for extension in ("pg_trgm", "btree_gin"):
+    event.listen(Base.metadata, "before_create", DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}").execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Employee.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
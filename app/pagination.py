@@ -0,0 +1,34 @@
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import sessionmaker
+from app.database import ReadSessionLocal
+from app.serialization import dumps
+
+# Rows fetched per round trip from the server-side cursor while streaming
+STREAM_BATCH_SIZE = 1000
+
+# Response header carrying the keyset cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def set_next_cursor(response: Response, items, limit, key: str = "id"):
+    """Advertise the cursor for the next page when this page came back full"""
+    if limit is not None and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(getattr(items[-1], key))
+
+def stream_ndjson(statement, session_factory: sessionmaker = ReadSessionLocal) -> StreamingResponse:
+    """
+    Stream the rows of a column select as newline-delimited JSON.
+    Rows are pulled through a server-side cursor in batches, so memory stays flat
+    regardless of result size. The generator owns its session because the
+    request-scoped one is closed before the body finishes streaming.
+    """
+    def generate():
+        db = session_factory()
+        try:
+            result = db.execute(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            for rows in result.partitions():
+                yield b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,169 @@
+import itertools
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Dict, Optional, Set, Tuple
+from app import models
+from app.changes import on_orgs_committed
+from app.config import settings
+from app.database import (
+    AsyncReadSessionLocal, AsyncReplicaSessionLocals, ReadSessionLocal, ReplicaSessionLocals,
+    async_replica_engines, engine, replica_engines
+)
+
+# Recent writes tracked before expired ones are pruned
+MAX_TRACKED_WRITES = 10000
+
+class ReplicaRouter:
+    """
+    Chooses the database behind read-only requests. Reads go to the replicas in turn,
+    except that an org this process has just written is only read from replicas that
+    have shown the written version, and from the primary otherwise, until every replica
+    has it or the read-your-writes window passes.
+    """
+
+    def __init__(self, replica_count: int, sticky_seconds: float):
+        self.replica_count = replica_count
+        self.sticky_seconds = sticky_seconds
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self._next_replica = itertools.cycle(range(replica_count))
+        # org id -> (version written, or None for a deleted org; monotonic deadline;
+        # replicas seen to have the written version)
+        self._writes: Dict[int, Tuple[Optional[int], float, Set[int]]] = {}
+        self._lock = threading.Lock()
+
+    def record_writes(self, org_versions: Dict[int, Optional[int]]):
+        deadline = time.monotonic() + self.sticky_seconds
+        with self._lock:
+            self._writes.update((org_id, (version, deadline, set())) for org_id, version in org_versions.items())
+            if len(self._writes) > MAX_TRACKED_WRITES:
+                now = time.monotonic()
+                self._writes = {org_id: write for org_id, write in self._writes.items() if write[1] > now}
+
+    def next_replica(self) -> Optional[int]:
+        """Index of the replica for the next read, or None without replicas"""
+        return next(self._next_replica) if self.replica_count else None
+
+    def pending_write(self, org_id: Optional[int], replica: int) -> Optional[Tuple[Optional[int], float]]:
+        """The org's recent write that ``replica`` has not yet been seen to have, if any"""
+        if org_id is None:
+            return None
+        with self._lock:
+            write = self._writes.get(org_id)
+            if write is None:
+                return None
+            if write[1] <= time.monotonic():
+                del self._writes[org_id]
+                return None
+            if replica in write[2]:
+                return None
+            return write[0], write[1]
+
+    def check_replica(self, org_id: int, replica: int, written_version: Optional[int],
+                      replica_version: Optional[int]) -> bool:
+        """
+        Whether a replica showing ``replica_version`` has caught up. Caught-up replicas are
+        remembered per write, and the write is forgotten once every replica has it.
+        """
+        if written_version is None:
+            caught_up = replica_version is None
+        else:
+            caught_up = replica_version is not None and replica_version >= written_version
+        if caught_up:
+            with self._lock:
+                write = self._writes.get(org_id)
+                if write is not None and write[0] == written_version:
+                    write[2].add(replica)
+                    if len(write[2]) >= self.replica_count:
+                        del self._writes[org_id]
+        return caught_up
+
+    def count_read(self, on_replica: bool):
+        with self._lock:
+            if on_replica:
+                self.replica_reads += 1
+            else:
+                self.primary_reads += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": self.replica_count,
+                "read_your_writes_seconds": self.sticky_seconds,
+                "tracked_writes": len(self._writes),
+                "primary_reads": self.primary_reads,
+                "replica_reads": self.replica_reads,
+            }
+
+replica_router = ReplicaRouter(len(ReplicaSessionLocals), settings.read_your_writes_seconds)
+
+@on_orgs_committed
+def _track_committed_writes(org_versions):
+    replica_router.record_writes(org_versions)
+
+def _request_org_id(request: Request) -> Optional[int]:
+    org_id = request.path_params.get("org_id")
+    return int(org_id) if org_id is not None and str(org_id).isdigit() else None
+
+def _version_query(org_id: int):
+    return select(models.OrgChart.version).where(models.OrgChart.id == org_id)
+
+def open_read_session(org_id: Optional[int]) -> Session:
+    """A read-only session on a replica, or on the primary while the org's last write may be missing there"""
+    replica = replica_router.next_replica()
+    if replica is None:
+        return ReadSessionLocal()
+
+    db = ReplicaSessionLocals[replica]()
+    write = replica_router.pending_write(org_id, replica)
+    if write is not None:
+        replica_version = db.execute(_version_query(org_id)).scalar_one_or_none()
+        if not replica_router.check_replica(org_id, replica, write[0], replica_version):
+            db.close()
+            replica_router.count_read(on_replica=False)
+            return ReadSessionLocal()
+    replica_router.count_read(on_replica=True)
+    return db
+
+def get_read_db(request: Request):
+    db = open_read_session(_request_org_id(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    org_id = _request_org_id(request)
+    replica = replica_router.next_replica()
+    if replica is None:
+        db = AsyncReadSessionLocal()
+    else:
+        db = AsyncReplicaSessionLocals[replica]()
+        write = replica_router.pending_write(org_id, replica)
+        on_replica = True
+        if write is not None:
+            replica_version = (await db.execute(_version_query(org_id))).scalar_one_or_none()
+            if not replica_router.check_replica(org_id, replica, write[0], replica_version):
+                await db.close()
+                db = AsyncReadSessionLocal()
+                on_replica = False
+        replica_router.count_read(on_replica)
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# Sync session factory for each engine a read session may be bound to, including the
+# sync side of async engines, for work that outlives the request (e.g. NDJSON streams)
+_STREAM_SESSIONS: Dict[object, sessionmaker] = {engine: ReadSessionLocal}
+for replica_engine, session_factory in zip(replica_engines, ReplicaSessionLocals):
+    _STREAM_SESSIONS[replica_engine] = session_factory
+for replica_engine, session_factory in zip(async_replica_engines, ReplicaSessionLocals):
+    _STREAM_SESSIONS[replica_engine.sync_engine] = session_factory
+
+def stream_session_factory(db: Session) -> sessionmaker:
+    """The sync read session factory on the same database as ``db``"""
+    return _STREAM_SESSIONS.get(db.get_bind(), ReadSessionLocal)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List
+from app import schemas
+from app.replicas import get_read_db
+from app.auth import get_optional_current_user
+from app.changes import select_changes
+from app.pagination import set_next_cursor
+from app.serialization import rows_response
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.OrgChange])
+def list_changes(
+    response: Response,
+    since: int = Query(0, ge=0, description="Only changes with a greater sequence number"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Changes across every org chart after ``since``, in sequence order.
+    Resume from the last ``seq`` (also sent in X-Next-Cursor when the page is full).
+    """
+    changes = db.execute(select_changes(since, limit)).all()
+    set_next_cursor(response, changes, limit, key="seq")
+    return rows_response(changes, schemas.OrgChange, response)
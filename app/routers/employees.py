@@ -1,9 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 from app import models, schemas
 from app.database import get_db
+from app.replicas import get_read_db, stream_session_factory
+from app.cache import EmployeeRow, org_cache
+from app.changes import record_employee_changes, record_org_change
+from app.conditional import conditional_response, get_org_version, org_etag
+from app.filters import EMPLOYEE_SORT_PATTERN, select_employees
+from app.search import search_employees
+from app.serialization import FastJSONResponse, dumps, row_dicts, rows_response
 from app.auth import get_optional_current_user, has_permission
+from app.importer import parse_csv, plan_import, write_import
+from app.pagination import set_next_cursor, stream_ndjson
+from app.hierarchy import (
+    MAX_TREE_DEPTH, apply_subtree_moves, build_tree, count_subtree, get_ancestor_ids, get_chain_rows, get_org_stats, get_subtree_rows, lowest_common_manager,
+    move_subtrees, plan_subtree_moves, reparent_reports, reporting_path, set_path, would_create_cycle
+)
 
 router = APIRouter()
 
@@ -13,6 +27,51 @@ def get_employee(db: Session, employee_id: int):
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
+def get_employee_row(db: Session, employee_id: int) -> EmployeeRow:
+    """Load an employee as a lightweight read-only row, without touching the identity map"""
+    row = db.execute(select(*models.EMPLOYEE_COLUMNS).where(models.Employee.id == employee_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return EmployeeRow(*row)
+
+def get_employee_rows(db: Session, *criteria, limit: Optional[int] = None) -> List[EmployeeRow]:
+    """Load the employees matching ``criteria`` ordered by id as read-only rows"""
+    statement = select(*models.EMPLOYEE_COLUMNS).where(*criteria).order_by(models.Employee.id).limit(limit)
+    return [EmployeeRow(*row) for row in db.execute(statement)]
+
+def get_chains(db: Session, org_id: int, employee_ids: List[int], include_self: bool = False) -> Dict[int, list]:
+    """
+    Management chains of several employees, from a cached org snapshot or a single recursive query.
+    Raises 404 for any employee that is not in the organization.
+    """
+    snapshot = org_cache.peek_snapshot(org_id)
+    if snapshot is not None:
+        chains = {
+            employee_id: snapshot.chain(employee_id, include_self)
+            for employee_id in employee_ids
+            if employee_id in snapshot.employees
+        }
+    else:
+        chains = get_chain_rows(db, org_id, employee_ids, include_self)
+    
+    for employee_id in employee_ids:
+        if employee_id not in chains:
+            raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found in this organization")
+    return chains
+
+def reporting_path_dict(lineages: Dict[int, list], from_id: int, to_id: int) -> dict:
+    """Build a ReportingPath payload from preloaded lineages"""
+    result = reporting_path(lineages[from_id], lineages[to_id])
+    if result is None:
+        raise HTTPException(status_code=400, detail=f"Employees {from_id} and {to_id} have no common manager")
+    common, path = result
+    return {
+        "from_id": from_id,
+        "to_id": to_id,
+        "common_manager": row_dicts([common], schemas.Employee)[0],
+        "path": row_dicts(path, schemas.Employee),
+    }
+
 def is_ceo(db: Session, employee_id: int) -> bool:
     employee = get_employee(db, employee_id)
     return employee.manager_id is None
@@ -24,43 +83,13 @@ def check_org_exists(db: Session, org_id: int):
         raise HTTPException(status_code=404, detail="Organization not found")
     return org
 
-def would_create_cycle(db: Session, manager_id: int, subordinate_id: int, visited=None):
-    """Check if assigning manager_id as manager of subordinate_id would create a cycle"""
-    if visited is None:
-        visited = set()
-    
-    if manager_id == subordinate_id:
-        return True
-    
-    if manager_id in visited:
-        return True
-    
-    visited.add(manager_id)
-    
-    # Get the manager's manager
-    manager = db.query(models.Employee).filter(models.Employee.id == manager_id).first()
-    if not manager or manager.manager_id is None:
-        return False  # Reached CEO, no loop
-    
-    # Check if this creates a loop
-    if manager.manager_id == subordinate_id:
-        return True
-        
-    # Continue checking up the chain
-    return would_create_cycle(db, manager.manager_id, subordinate_id, visited)
-
-@router.post("/", response_model=schemas.Employee, dependencies=[Depends(has_permission(["create_employee"]))])
-def create_employee(
-    org_id: int, 
-    employee: schemas.EmployeeCreate, 
-    db: Session = Depends(get_db),
-    current_user = Depends(get_optional_current_user)
-):
-    """Create a new employee"""
+def add_employee(db: Session, org_id: int, employee: schemas.EmployeeCreate) -> models.Employee:
+    """Validate and add a new employee to the session, without committing"""
     # Verify the organization exists
     check_org_exists(db, org_id)
     
     # If manager_id is provided, verify it exists and belongs to the same org
+    manager = None
     if employee.manager_id:
         manager = get_employee(db, employee.manager_id)
         if manager.org_id != org_id:
@@ -72,41 +101,192 @@ def create_employee(
     
     db_employee = models.Employee(**employee.model_dump(), org_id=org_id)
     db.add(db_employee)
+    
+    # Flush to get the new id, then record its position in the hierarchy
+    db.flush()
+    set_path(db_employee, manager)
+    record_employee_changes(db, org_id, [db_employee.id])
+    return db_employee
+
+@router.post("/", response_model=schemas.Employee, dependencies=[Depends(has_permission(["create_employee"]))])
+def create_employee(
+    org_id: int, 
+    employee: schemas.EmployeeCreate, 
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Create a new employee"""
+    db_employee = add_employee(db, org_id, employee)
+    record_org_change(db, org_id)
     db.commit()
     db.refresh(db_employee)
     return db_employee
 
+def import_records(db: Session, org_id: int, records: List[schemas.EmployeeImportRecord]):
+    """Validate and write a bulk import in a single transaction"""
+    check_org_exists(db, org_id)
+    levels = plan_import(db, org_id, records)
+    ids = write_import(db, org_id, levels)
+    record_employee_changes(db, org_id, ids.values())
+    record_org_change(db, org_id)
+    db.commit()
+    return schemas.EmployeeImportResult(created=len(ids), ids=ids)
+
+@router.post("/import", response_model=schemas.EmployeeImportResult, dependencies=[Depends(has_permission(["create_employee"]))])
+def import_employees(
+    org_id: int, 
+    request: schemas.EmployeeImportRequest, 
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Create a whole hierarchy of employees at once.
+    Each record has a client-side ``key``; managers are referenced either by
+    ``manager_key`` (another record in the request) or ``manager_id`` (an existing employee).
+    """
+    return import_records(db, org_id, request.employees)
+
+@router.post("/import/csv", response_model=schemas.EmployeeImportResult, dependencies=[Depends(has_permission(["create_employee"]))])
+def import_employees_csv(
+    org_id: int, 
+    file: UploadFile = File(..., description="CSV with columns key,name,title,manager_key,manager_id"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Create a whole hierarchy of employees from an uploaded CSV file"""
+    records = parse_csv(file.file.read())
+    return import_records(db, org_id, records)
+
 @router.get("/", response_model=List[schemas.Employee])
 def list_employees(
     org_id: int, 
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    title: Optional[str] = Query(None, description="Only employees with this title (case-insensitive)"),
+    manager_id: Optional[int] = Query(None, description="Only direct reports of this manager"),
+    name_prefix: Optional[str] = Query(None, max_length=100, description="Only employees whose name starts with this (case-insensitive)"),
+    has_reports: Optional[bool] = Query(None, description="Only managers (true) or only individual contributors (false)"),
+    min_depth: Optional[int] = Query(None, ge=0, description="Only employees at least this many levels below the CEO"),
+    max_depth: Optional[int] = Query(None, ge=0, description="Only employees at most this many levels below the CEO"),
+    sort: str = Query("id", pattern=EMPLOYEE_SORT_PATTERN, description="id, name, title or depth; prefix with - for descending"),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: the id of the last employee of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of employees to return"),
+    stream: bool = Query(False, description="Stream every matching employee as NDJSON"),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """List all employees in an organization"""
-    employees = db.query(models.Employee).filter(models.Employee.org_id == org_id).all()
-    return employees
+    """
+    List employees in an organization, optionally filtered and sorted (by id by default).
+    Page with ``limit`` and ``after_id`` (the next cursor is returned in the
+    X-Next-Cursor header), or set ``stream`` to receive NDJSON.
+    Pages carry the org's version as ETag and honor If-None-Match.
+    """
+    filtered = any(value is not None for value in (title, manager_id, name_prefix, has_reports, min_depth, max_depth))
+    statement = select_employees(
+        db, org_id,
+        title=title, manager_id=manager_id, name_prefix=name_prefix, has_reports=has_reports,
+        min_depth=min_depth, max_depth=max_depth, sort=sort, after_id=after_id, limit=limit,
+    )
+    
+    if stream:
+        return stream_ndjson(statement, stream_session_factory(db))
+    
+    # Read the version before the employees: a concurrent commit can only make the ETag stale, never the data
+    version = get_org_version(db, org_id)
+    not_modified = conditional_response(request, response, org_etag(org_id, version) if version is not None else None)
+    if not_modified is not None:
+        return not_modified
+    
+    # The cached snapshot only holds the default id order. It must be of the ETag's version:
+    # an older one (another worker's write within the TTL, or a commit not yet invalidated)
+    # would otherwise be cached by the client under the new ETag
+    snapshot = org_cache.get_snapshot(db, org_id, version) if not filtered and sort == "id" else None
+    if snapshot is not None:
+        employees = snapshot.page(after_id, limit)
+    else:
+        employees = [EmployeeRow(*row) for row in db.execute(statement)]
+    set_next_cursor(response, employees, limit)
+    return rows_response(employees, schemas.Employee, response)
+
+@router.get("/search", response_model=List[schemas.EmployeeSearchResult])
+def search_employees_by_name(
+    org_id: int, 
+    q: str = Query(..., min_length=1, max_length=100, description="Text to find in employee names and titles"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Search employees by name or title, best matches first.
+    Prefix matches rank highest, followed by substring and fuzzy (trigram) matches.
+    """
+    # Surrounding whitespace is ignored, and an empty prefix would match everyone
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be blank")
+    
+    return rows_response(search_employees(db, org_id, q, skip, limit), schemas.EmployeeSearchResult)
 
 @router.get("/{employee_id}", response_model=schemas.Employee)
 def get_employee_by_id(
     org_id: int, 
     employee_id: int, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
     """Get an employee by ID"""
-    employee = get_employee(db, employee_id)
+    snapshot = org_cache.peek_snapshot(org_id)
+    if snapshot is not None and employee_id in snapshot.employees:
+        return snapshot.employees[employee_id]
+    
+    employee = get_employee_row(db, employee_id)
     if employee.org_id != org_id:
         raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
     return employee
 
-@router.delete("/{employee_id}", dependencies=[Depends(has_permission(["delete_employee"]))])
-def delete_employee(
+@router.post("/lookup", response_model=schemas.EmployeeLookupResult)
+def lookup_employees(
     org_id: int, 
-    employee_id: int, 
-    db: Session = Depends(get_db),
+    request: schemas.EmployeeLookupRequest, 
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """Delete an employee"""
+    """
+    Get many employees by id at once. Ids that do not exist or belong to another
+    organization are reported instead of failing the whole request.
+    """
+    employee_ids = list(dict.fromkeys(request.employee_ids))
+    
+    snapshot = org_cache.peek_snapshot(org_id)
+    found = {}
+    if snapshot is not None:
+        found = {
+            employee_id: snapshot.employees[employee_id]
+            for employee_id in employee_ids
+            if employee_id in snapshot.employees
+        }
+    
+    # Everything not served from the cache comes from a single IN query
+    missing_ids = [employee_id for employee_id in employee_ids if employee_id not in found]
+    other_org_ids = set()
+    if missing_ids:
+        for row in get_employee_rows(db, models.Employee.id.in_(missing_ids)):
+            if row.org_id == org_id:
+                found[row.id] = row
+            else:
+                other_org_ids.add(row.id)
+    
+    return FastJSONResponse(dumps({
+        "employees": row_dicts([found[employee_id] for employee_id in employee_ids if employee_id in found], schemas.Employee),
+        "not_found": [
+            employee_id for employee_id in employee_ids
+            if employee_id not in found and employee_id not in other_org_ids
+        ],
+        "not_in_organization": [employee_id for employee_id in employee_ids if employee_id in other_org_ids],
+    }))
+
+def remove_employee(db: Session, org_id: int, employee_id: int):
+    """Delete an employee, moving their reports up a level, without committing"""
     employee = get_employee(db, employee_id)
     
     if employee.org_id != org_id:
@@ -115,46 +295,43 @@ def delete_employee(
     if is_ceo(db, employee_id):
         raise HTTPException(status_code=403, detail="Cannot delete CEO")
     
-    # Get all direct reports
-    reports = db.query(models.Employee).filter(
-        models.Employee.org_id == org_id,
-        models.Employee.manager_id == employee_id
-    ).all()
-    
-    # Get CEO of the organization (for cases where we need to reassign to CEO)
-    ceo = db.query(models.Employee).filter(
-        models.Employee.org_id == org_id,
-        models.Employee.manager_id.is_(None)
-    ).first()
-    
     # Employee's manager ID (could be null if they report directly to CEO)
     employee_manager_id = employee.manager_id
     
-    if reports:
-        for report in reports:
-            # If the employee being deleted reports to the CEO (null manager_id),
-            # reassign their direct reports to the CEO
-            if employee_manager_id is None and ceo:
-                report.manager_id = ceo.id
-            else:
-                report.manager_id = employee_manager_id
-        
-        # Apply changes to ensure all reports are updated before deleting the employee
-        db.flush()
+    # If the employee being deleted reports to the CEO (null manager_id),
+    # reassign their direct reports to the CEO
+    if employee_manager_id is None:
+        new_manager = db.query(models.Employee).filter(
+            models.Employee.org_id == org_id,
+            models.Employee.manager_id.is_(None)
+        ).first()
+    else:
+        new_manager = get_employee(db, employee_manager_id)
+    
+    # Move all direct reports (and their subtrees) up in a single statement
+    # before deleting the employee
+    report_ids = reparent_reports(db, org_id, employee, new_manager)
     
     # Delete the employee
     db.delete(employee)
-    db.commit()
-    return {"message": "Employee deleted successfully"}
+    record_employee_changes(db, org_id, report_ids)
+    record_employee_changes(db, org_id, [employee_id], deleted=True)
 
-@router.put("/{employee_id}/promote", response_model=schemas.Employee, dependencies=[Depends(has_permission(["promote_employee"]))])
-def promote_to_ceo(
+@router.delete("/{employee_id}", dependencies=[Depends(has_permission(["delete_employee"]))])
+def delete_employee(
     org_id: int, 
     employee_id: int, 
     db: Session = Depends(get_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """Promote an employee to CEO"""
+    """Delete an employee"""
+    remove_employee(db, org_id, employee_id)
+    record_org_change(db, org_id)
+    db.commit()
+    return {"message": "Employee deleted successfully"}
+
+def make_ceo(db: Session, org_id: int, employee_id: int) -> models.Employee:
+    """Promote an employee to CEO, demoting the current one, without committing"""
     # Verify the organization exists
     check_org_exists(db, org_id)
     
@@ -174,28 +351,35 @@ def promote_to_ceo(
         models.Employee.manager_id.is_(None)
     ).first()
     
+    # Ensure we're not creating a cycle (current CEO shouldn't report to someone who reports to them)
+    creates_cycle = current_ceo is not None and would_create_cycle(db, employee_id, current_ceo.id)
+    
+    # Promote new CEO, detaching their subtree first so the moves below can hang under it
+    employee.manager_id = None
+    move_subtrees(db, org_id, [(employee, None)])
+    
+    record_employee_changes(db, org_id, [employee_id])
     if current_ceo:
-        # Ensure we're not creating a cycle (current CEO shouldn't report to someone who reports to them)
-        if would_create_cycle(db, employee_id, current_ceo.id):
-            # Find the CEO's direct reports that aren't the new CEO
-            ceo_reports = db.query(models.Employee).filter(
-                models.Employee.org_id == org_id,
-                models.Employee.manager_id == current_ceo.id,
-                models.Employee.id != employee_id
-            ).all()
-            
-            # Move CEO's direct reports to the new CEO to prevent cycles
-            for report in ceo_reports:
-                report.manager_id = employee_id
-            
-            # Apply these changes first
-            db.flush()
+        if creates_cycle:
+            # Move the CEO's remaining direct reports to the new CEO in a single statement
+            record_employee_changes(db, org_id, reparent_reports(db, org_id, current_ceo, employee))
         
         # Demote current CEO to report to new CEO
         current_ceo.manager_id = employee_id
-    
-    # Promote new CEO
-    employee.manager_id = None
+        move_subtrees(db, org_id, [(current_ceo, employee)])
+        record_employee_changes(db, org_id, [current_ceo.id])
+    return employee
+
+@router.put("/{employee_id}/promote", response_model=schemas.Employee, dependencies=[Depends(has_permission(["promote_employee"]))])
+def promote_to_ceo(
+    org_id: int, 
+    employee_id: int, 
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Promote an employee to CEO"""
+    employee = make_ceo(db, org_id, employee_id)
+    record_org_change(db, org_id)
     db.commit()
     db.refresh(employee)
     return employee
@@ -204,32 +388,164 @@ def promote_to_ceo(
 def get_direct_reports(
     org_id: int, 
     employee_id: int, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
     """Get all direct reports for an employee"""
-    employee = get_employee(db, employee_id)
+    snapshot = org_cache.peek_snapshot(org_id)
+    if snapshot is not None and employee_id in snapshot.employees:
+        return rows_response(snapshot.direct_reports(employee_id), schemas.Employee)
+    
+    employee = get_employee_row(db, employee_id)
     
     if employee.org_id != org_id:
         raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
     
     # Get all direct reports
-    direct_reports = db.query(models.Employee).filter(
+    direct_reports = get_employee_rows(
+        db,
         models.Employee.org_id == org_id,
         models.Employee.manager_id == employee_id
-    ).all()
+    )
     
-    return direct_reports
+    return rows_response(direct_reports, schemas.Employee)
 
-@router.put("/{employee_id}", response_model=schemas.Employee, dependencies=[Depends(has_permission(["update_employee"]))])
-def update_employee(
+@router.get("/{employee_id}/tree", response_model=schemas.EmployeeWithReports)
+def get_employee_tree(
     org_id: int, 
     employee_id: int, 
-    employee_update: schemas.EmployeeCreate, 
-    db: Session = Depends(get_db),
+    max_depth: Optional[int] = Query(
+        None, ge=0, le=MAX_TREE_DEPTH, description=f"Maximum number of levels below the employee to include (at most {MAX_TREE_DEPTH})"
+    ),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """Update an employee's information"""
+    """
+    Get the nested reporting tree below an employee.
+    Subtrees deeper than MAX_TREE_DEPTH levels must be requested with ``max_depth``.
+    """
+    # Fetch the whole subtree in one query instead of walking direct_reports per node;
+    # one level past the limit tells an over-deep subtree apart from one that just fits
+    rows = get_subtree_rows(db, org_id, employee_id, max_depth if max_depth is not None else MAX_TREE_DEPTH + 1)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    if rows[0].org_id != org_id:
+        raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
+    
+    if rows[-1].depth > MAX_TREE_DEPTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Subtree is more than {MAX_TREE_DEPTH} levels deep; pass max_depth (at most {MAX_TREE_DEPTH})"
+        )
+    
+    return build_tree(rows)
+
+@router.get("/{employee_id}/headcount", response_model=schemas.SubtreeHeadcount)
+def get_subtree_headcount(
+    org_id: int, 
+    employee_id: int, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Count an employee and everyone below them"""
+    headcount = count_subtree(db, org_id, employee_id)
+    if headcount is None:
+        get_employee_row(db, employee_id)
+        raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
+    
+    return {"employee_id": employee_id, "org_id": org_id, "headcount": headcount}
+
+@router.get("/{employee_id}/chain", response_model=List[schemas.Employee])
+def get_reporting_chain(
+    org_id: int, 
+    employee_id: int, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Get an employee's managers, from their direct manager up to the CEO"""
+    snapshot = org_cache.peek_snapshot(org_id)
+    if snapshot is not None and employee_id in snapshot.employees:
+        return rows_response(snapshot.chain(employee_id), schemas.Employee)
+    
+    # Walk the whole chain in one recursive query
+    chains = get_chain_rows(db, org_id, [employee_id])
+    if employee_id not in chains:
+        get_employee_row(db, employee_id)
+        raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
+    
+    return rows_response(chains[employee_id], schemas.Employee)
+
+@router.post("/chains", response_model=List[schemas.EmployeeChain])
+def get_reporting_chains(
+    org_id: int, 
+    request: schemas.EmployeeChainRequest, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Get the management chains of many employees at once, in request order"""
+    employee_ids = list(dict.fromkeys(request.employee_ids))
+    chains = get_chains(db, org_id, employee_ids)
+    
+    return FastJSONResponse(dumps([
+        {"employee_id": employee_id, "chain": row_dicts(chains[employee_id], schemas.Employee)}
+        for employee_id in employee_ids
+    ]))
+
+@router.post("/common_manager", response_model=schemas.Employee)
+def get_common_manager(
+    org_id: int, 
+    request: schemas.CommonManagerRequest, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Get the lowest manager shared by all the given employees.
+    If one of them manages all the others, that employee is returned.
+    """
+    employee_ids = list(dict.fromkeys(request.employee_ids))
+    lineages = get_chains(db, org_id, employee_ids, include_self=True)
+    
+    common = lowest_common_manager([lineages[employee_id] for employee_id in employee_ids])
+    if common is None:
+        raise HTTPException(status_code=400, detail="Employees have no common manager")
+    return common
+
+@router.get("/{employee_id}/path/{other_id}", response_model=schemas.ReportingPath)
+def get_reporting_path(
+    org_id: int, 
+    employee_id: int, 
+    other_id: int, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Get the reporting path from one employee up to their lowest common manager with another and down to them"""
+    lineages = get_chains(db, org_id, list(dict.fromkeys([employee_id, other_id])), include_self=True)
+    return FastJSONResponse(dumps(reporting_path_dict(lineages, employee_id, other_id)))
+
+@router.post("/paths", response_model=List[schemas.ReportingPath])
+def get_reporting_paths(
+    org_id: int, 
+    request: schemas.ReportingPathsRequest, 
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Get the reporting paths for many pairs of employees, loading all their chains at once"""
+    employee_ids = list(dict.fromkeys(employee_id for pair in request.pairs for employee_id in pair))
+    lineages = get_chains(db, org_id, employee_ids, include_self=True)
+    
+    return FastJSONResponse(dumps([
+        reporting_path_dict(lineages, from_id, to_id)
+        for from_id, to_id in request.pairs
+    ]))
+
+def change_employee(
+    db: Session,
+    org_id: int,
+    employee_id: int,
+    employee_update: schemas.EmployeeCreate
+) -> models.Employee:
+    """Validate and apply an update to an employee, without committing"""
     # Verify the organization exists
     check_org_exists(db, org_id)
     
@@ -241,6 +557,7 @@ def update_employee(
         raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
     
     # If updating manager_id, validate it doesn't create cycles
+    manager = None
     if employee_update.manager_id:
         # Cannot assign self as manager
         if employee_id == employee_update.manager_id:
@@ -259,24 +576,96 @@ def update_employee(
         if is_ceo(db, employee_id):
             raise HTTPException(status_code=400, detail="Cannot change CEO's manager through this endpoint. Use promote_to_ceo instead.")
     
+    # Keep the hierarchy paths in step when the employee changes manager
+    if employee_update.manager_id != db_employee.manager_id:
+        move_subtrees(db, org_id, [(db_employee, manager)])
+    
     # Update employee fields
     db_employee.name = employee_update.name
     db_employee.title = employee_update.title
     db_employee.manager_id = employee_update.manager_id
-    
+    record_employee_changes(db, org_id, [employee_id])
+    return db_employee
+
+@router.put("/{employee_id}", response_model=schemas.Employee, dependencies=[Depends(has_permission(["update_employee"]))])
+def update_employee(
+    org_id: int, 
+    employee_id: int, 
+    employee_update: schemas.EmployeeCreate, 
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Update an employee's information"""
+    db_employee = change_employee(db, org_id, employee_id, employee_update)
+    record_org_change(db, org_id)
     db.commit()
     db.refresh(db_employee)
     return db_employee
 
-@router.put("/{employee_id}/assign_as_manager", response_model=schemas.Employee, dependencies=[Depends(has_permission(["assign_manager"]))])
-def assign_as_manager(
+def move_employee_subtrees(db: Session, org_id: int, requested_moves: List[schemas.SubtreeMove]) -> List[int]:
+    """
+    Validate and apply subtree moves without committing. Returns the moved employee ids.
+    The number of queries never depends on the size or depth of the moved subtrees.
+    """
+    moves = {}
+    for move in requested_moves:
+        if move.employee_id == move.manager_id:
+            raise HTTPException(status_code=400, detail="Employee cannot be their own manager")
+        if moves.setdefault(move.employee_id, move.manager_id) != move.manager_id:
+            raise HTTPException(status_code=400, detail=f"Employee {move.employee_id} is moved more than once")
+    
+    # Load every moved employee and new manager with a single query
+    employee_ids = set(moves) | set(moves.values())
+    employees = {
+        employee.id: employee
+        for employee in db.query(models.Employee).filter(models.Employee.id.in_(employee_ids)).all()
+    }
+    for employee_id in sorted(employee_ids):
+        employee = employees.get(employee_id)
+        if employee is None:
+            raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
+        if employee.org_id != org_id:
+            raise HTTPException(status_code=400, detail=f"Employee {employee_id} does not belong to this organization")
+    
+    for employee_id in moves:
+        if employees[employee_id].manager_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot move CEO (employee {employee_id}) through this endpoint. Use promote_to_ceo instead."
+            )
+    
+    # Current managers above every new manager, from one recursive query
+    parents = {employee.id: employee.manager_id for employee in employees.values()}
+    for lineage in get_chain_rows(db, org_id, list(set(moves.values())), include_self=True).values():
+        parents.update((row.id, row.manager_id) for row in lineage)
+    
+    try:
+        waves = plan_subtree_moves(moves, parents)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Moving employee {error.args[0]} would create a cycle in the reporting hierarchy"
+        )
+    
+    apply_subtree_moves(db, org_id, moves, waves)
+    record_employee_changes(db, org_id, moves)
+    return list(moves)
+
+@router.post("/move", response_model=List[schemas.Employee], dependencies=[Depends(has_permission(["update_employee"]))])
+def move_employees(
     org_id: int, 
-    employee_id: int, 
-    request: schemas.AssignManagerRequest,
+    request: schemas.SubtreeMoveRequest, 
     db: Session = Depends(get_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """Assign an employee as manager for a list of employees"""
+    """Move many employees, each with everyone below them, under new managers in one transaction"""
+    moved_ids = move_employee_subtrees(db, org_id, request.moves)
+    record_org_change(db, org_id)
+    db.commit()
+    return get_employee_rows(db, models.Employee.id.in_(moved_ids))
+
+def assign_reports(db: Session, org_id: int, employee_id: int, employee_ids: List[int]) -> models.Employee:
+    """Validate and make an employee the manager of others, without committing"""
     # Verify organization exists
     check_org_exists(db, org_id)
     
@@ -287,7 +676,7 @@ def assign_as_manager(
         raise HTTPException(status_code=400, detail="Employee does not belong to this organization")
     
     # Can't assign a CEO as manager via this endpoint
-    if is_ceo(db, employee_id):
+    if employee.manager_id is None:
         raise HTTPException(status_code=400, detail="Cannot assign CEO as manager through this endpoint. Use promote_to_ceo instead.")
     
     # Get the CEO for handling hierarchical loops
@@ -302,12 +691,24 @@ def assign_as_manager(
     # Get employee's current manager
     current_manager_id = employee.manager_id
     
+    # Load the new manager's chain once; every cycle check below is a set lookup
+    manager_ancestors = set(get_ancestor_ids(db, employee_id))
+    
+    # Load every subordinate with a single query
+    subordinate_ids = list(dict.fromkeys(employee_ids))
+    subordinates = {
+        subordinate.id: subordinate
+        for subordinate in db.query(models.Employee).filter(models.Employee.id.in_(subordinate_ids)).all()
+    }
+    
     # Verify each employee in the request and check for potential cycles
-    for subordinate_id in request.employee_ids:
+    for subordinate_id in subordinate_ids:
         if subordinate_id == employee_id:
             raise HTTPException(status_code=400, detail="Employee cannot be their own manager")
             
-        subordinate = get_employee(db, subordinate_id)
+        subordinate = subordinates.get(subordinate_id)
+        if not subordinate:
+            raise HTTPException(status_code=404, detail="Employee not found")
         
         # Verify subordinate belongs to the same org
         if subordinate.org_id != org_id:
@@ -317,31 +718,134 @@ def assign_as_manager(
             )
             
         # Don't allow assigning CEO as subordinate
-        if is_ceo(db, subordinate_id):
+        if subordinate.manager_id is None:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Cannot assign CEO (employee {subordinate_id}) as a subordinate"
             )
         
         # Check if this assignment would create a cycle
-        if would_create_cycle(db, employee_id, subordinate_id):
+        if would_create_cycle(db, employee_id, subordinate_id, manager_ancestors):
             raise HTTPException(
                 status_code=400,
                 detail=f"Assigning employee {employee_id} as manager of {subordinate_id} would create a cycle"
             )
             
-    # Process the assignments after validation
-    for subordinate_id in request.employee_ids:
-        subordinate = db.query(models.Employee).filter(models.Employee.id == subordinate_id).first()
-        
-        # Handle special case: if employee is being assigned as manager of their current manager,
-        # reassign their current manager to report to the CEO
-        if subordinate_id == current_manager_id:
-            employee.manager_id = ceo.id
-            
-        # Set the new manager
-        subordinate.manager_id = employee_id
-    
+    # Handle special case: if employee is being assigned as manager of their current manager,
+    # reassign their current manager to report to the CEO
+    if current_manager_id in subordinates:
+        employee.manager_id = ceo.id
+        move_subtrees(db, org_id, [(employee, ceo)])
+        record_employee_changes(db, org_id, [employee_id])
+    
+    # Process the assignments after validation with one UPDATE for manager ids
+    # and one for the hierarchy paths of all moved subtrees
+    if subordinate_ids:
+        db.execute(
+            update(models.Employee)
+            .where(models.Employee.id.in_(subordinate_ids))
+            .values(manager_id=employee_id)
+            .execution_options(synchronize_session=False)
+        )
+        move_subtrees(db, org_id, [(subordinate, employee) for subordinate in subordinates.values()])
+        record_employee_changes(db, org_id, subordinate_ids)
+    return employee
+
+@router.put("/{employee_id}/assign_as_manager", response_model=schemas.Employee, dependencies=[Depends(has_permission(["assign_manager"]))])
+def assign_as_manager(
+    org_id: int, 
+    employee_id: int, 
+    request: schemas.AssignManagerRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Assign an employee as manager for a list of employees"""
+    employee = assign_reports(db, org_id, employee_id, request.employee_ids)
+    record_org_change(db, org_id)
     db.commit()
     db.refresh(employee)
-    return employee
\ No newline at end of file
+    return employee
+
+def resolve_manager_key(operation, keys: Dict[str, int]) -> Optional[int]:
+    """The manager id of a batch create/update, following a manager_key to an employee created earlier"""
+    if operation.manager_key is None:
+        return operation.manager_id
+    if operation.manager_id is not None:
+        raise HTTPException(status_code=400, detail="Give either manager_id or manager_key, not both")
+    if operation.manager_key not in keys:
+        raise HTTPException(status_code=400, detail=f"Unknown manager_key '{operation.manager_key}'")
+    return keys[operation.manager_key]
+
+def apply_batch_operation(db: Session, org_id: int, operation, keys: Dict[str, int]) -> List[int]:
+    """Apply one batch operation without committing. Returns the ids of the employees it created or changed."""
+    if operation.op in ("create", "update"):
+        employee = schemas.EmployeeCreate(
+            name=operation.name, title=operation.title, manager_id=resolve_manager_key(operation, keys)
+        )
+        if operation.op == "update":
+            return [change_employee(db, org_id, operation.employee_id, employee).id]
+        if operation.key is not None and operation.key in keys:
+            raise HTTPException(status_code=400, detail=f"Duplicate key '{operation.key}'")
+        db_employee = add_employee(db, org_id, employee)
+        if operation.key is not None:
+            keys[operation.key] = db_employee.id
+        return [db_employee.id]
+    if operation.op == "delete":
+        remove_employee(db, org_id, operation.employee_id)
+        return []
+    if operation.op == "promote":
+        return [make_ceo(db, org_id, operation.employee_id).id]
+    if operation.op == "assign_manager":
+        return [assign_reports(db, org_id, operation.employee_id, operation.employee_ids).id]
+    return move_employee_subtrees(db, org_id, operation.moves)
+
+def check_batch_end_state(db: Session, org_id: int):
+    """Reject a batch that leaves several CEOs, or employees that cannot reach the CEO"""
+    stats = get_org_stats(db, org_id)
+    levels = stats["headcount_by_depth"]
+    if levels and levels[0]["headcount"] > 1:
+        raise HTTPException(status_code=400, detail="Batch would leave the organization with more than one CEO")
+    if sum(level["headcount"] for level in levels) != stats["headcount"]:
+        raise HTTPException(status_code=400, detail="Batch would leave employees outside the CEO's hierarchy")
+
+@router.post("/batch", response_model=List[schemas.BatchOperationResult], dependencies=[Depends(has_permission(["create_employee", "update_employee", "delete_employee", "promote_employee", "assign_manager"]))])
+def apply_batch(
+    org_id: int, 
+    request: schemas.BatchRequest, 
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Apply an ordered list of creates, updates, deletes, promotions, manager assignments and moves
+    in one transaction. Each operation is validated against the state left by the ones before it,
+    the final hierarchy is checked once, and everything is committed together or not at all.
+    """
+    keys: Dict[str, int] = {}
+    changed_ids = []
+    for index, operation in enumerate(request.operations):
+        try:
+            changed_ids.append(apply_batch_operation(db, org_id, operation, keys))
+            # Later operations query the database, so they must see this one
+            db.flush()
+        except HTTPException as error:
+            db.rollback()
+            raise HTTPException(
+                status_code=error.status_code,
+                detail={"index": index, "op": operation.op, "detail": error.detail}
+            )
+    
+    try:
+        check_batch_end_state(db, org_id)
+    except HTTPException:
+        db.rollback()
+        raise
+    
+    record_org_change(db, org_id)
+    db.commit()
+    
+    all_ids = {employee_id for ids in changed_ids for employee_id in ids}
+    rows = {row.id: row for row in get_employee_rows(db, models.Employee.id.in_(all_ids))}
+    return [
+        {"index": index, "op": operation.op, "employees": [rows[employee_id] for employee_id in ids if employee_id in rows]}
+        for index, (operation, ids) in enumerate(zip(request.operations, changed_ids))
+    ]
@@ -0,0 +1,142 @@
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from typing import AsyncIterator, List, Optional, Tuple
+from app import events, models
+from app.auth import get_optional_current_user
+from app.changes import select_changes
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.serialization import dumps
+
+router = APIRouter()
+
+# Largest page of change feed entries read while a stream catches up
+CATCH_UP_BATCH_SIZE = 1000
+
+def get_feed_position(org_id: int) -> int:
+    """Latest change feed sequence number of an org, or 404 if the org does not exist"""
+    with ReadSessionLocal() as db:
+        if db.get(models.OrgChart, org_id) is None:
+            raise HTTPException(status_code=404, detail="Organization chart not found")
+        return db.execute(
+            select(func.coalesce(func.max(models.OrgChange.seq), 0)).where(models.OrgChange.org_id == org_id)
+        ).scalar_one()
+
+def read_changes(org_id: int, since: int) -> List[dict]:
+    """One page of an org's change feed entries after ``since``"""
+    with ReadSessionLocal() as db:
+        return [row._asdict() for row in db.execute(select_changes(since, CATCH_UP_BATCH_SIZE, org_id))]
+
+def format_event(entry: dict) -> bytes:
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (entry["seq"], dumps(entry))
+
+def is_org_deleted(entry: dict) -> bool:
+    return entry["entity"] == "org_chart" and entry["action"] == "delete"
+
+async def catch_up(org_id: int, since: int) -> AsyncIterator[Tuple[bytes, int, bool]]:
+    """Replay the change feed after ``since`` as (event, seq, org deleted) tuples"""
+    while True:
+        entries = await run_in_threadpool(read_changes, org_id, since)
+        for entry in entries:
+            yield format_event(entry), entry["seq"], is_org_deleted(entry)
+        if len(entries) < CATCH_UP_BATCH_SIZE:
+            return
+        since = entries[-1]["seq"]
+
+async def org_event_stream(subscription: events.Subscription, since: int) -> AsyncIterator[bytes]:
+    """
+    Replay the feed after ``since``, then forward live batches from the broker.
+    Live batches are only notifications of what the feed already holds, so whenever
+    one cannot be forwarded as-is (the queue overflowed, or it arrived after a later
+    batch) the stream re-reads the feed instead. Delivery is at least once, and each
+    row's last event always carries its committed state.
+    """
+    org_id = subscription.org_id
+    # Everything up to read_through has been read from the feed; last_seq is the latest sent
+    read_through = last_seq = since
+    resync_from: Optional[int] = since
+    try:
+        while True:
+            if resync_from is not None:
+                async for event, seq, deleted in catch_up(org_id, resync_from):
+                    yield event
+                    read_through = last_seq = max(last_seq, seq)
+                    if deleted:
+                        return
+                resync_from = None
+
+            try:
+                entries = await asyncio.wait_for(subscription.get(), timeout=settings.event_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+
+            if entries is None:
+                subscription.resume()
+                resync_from = last_seq
+                continue
+            entries = [entry for entry in entries if entry["seq"] > read_through]
+            if not entries:
+                continue
+            if entries[0]["seq"] < last_seq:
+                # Committed before a batch that was already sent
+                resync_from = entries[0]["seq"] - 1
+                continue
+            for entry in entries:
+                yield format_event(entry)
+                if is_org_deleted(entry):
+                    return
+            last_seq = entries[-1]["seq"]
+    finally:
+        events.broker.unsubscribe(subscription)
+
+class SubscriptionStreamingResponse(StreamingResponse):
+    """
+    Event stream response that ends its broker subscription however the response ends,
+    including when the client disconnects before the body generator has started.
+    """
+
+    def __init__(self, subscription: events.Subscription, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            events.broker.unsubscribe(self.subscription)
+
+@router.get("/{org_id}/events")
+async def stream_org_events(
+    org_id: int,
+    since: Optional[int] = Query(None, ge=0, description="Replay changes after this sequence number first"),
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource on reconnect; same as since"),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Server-sent events for every committed change to an org chart and its employees.
+    Each ``change`` event carries a change feed entry, with its ``seq`` as the event id,
+    so reconnecting clients resume where they left off. Keep-alive comments are sent
+    while idle, and the stream ends after the org chart is deleted.
+    """
+    if since is None and last_event_id is not None and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    # Subscribe before reading the position, so nothing committed in between is missed
+    subscription = events.broker.subscribe(org_id)
+    try:
+        position = await run_in_threadpool(get_feed_position, org_id)
+    except BaseException:
+        # Any failure, including a database error or cancellation, ends the subscription
+        events.broker.unsubscribe(subscription)
+        raise
+
+    return SubscriptionStreamingResponse(
+        subscription,
+        org_event_stream(subscription, position if since is None else since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app import schemas
+from app.auth import get_optional_current_user
+from app.database import get_db
+from app.jobs import get_job
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job_status(
+    job_id: str,
+    # The primary, so a job is visible as soon as the request that started it returns
+    db: Session = Depends(get_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """Get the status of a background job"""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
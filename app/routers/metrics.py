@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from app.auth import get_optional_current_user
+from app import events
+from app.cache import org_cache
+from app.database import async_engine, async_replica_engines, engine, replica_engines
+from app.instrumentation import snapshot
+from app.replicas import replica_router
+
+router = APIRouter()
+
+@router.get("/db")
+def get_db_metrics(current_user = Depends(get_optional_current_user)):
+    """
+    Connection pool occupancy, checkout wait times and per-request query statistics.
+    Use these to size DB_POOL_SIZE / DB_MAX_OVERFLOW for the number of uvicorn workers.
+    """
+    return {
+        **snapshot(engine, async_engine, replica_engines, async_replica_engines),
+        "read_routing": replica_router.stats(),
+    }
+
+@router.get("/cache")
+def get_cache_metrics(current_user = Depends(get_optional_current_user)):
+    """Org hierarchy cache hit rate, size and evictions for this worker process"""
+    return org_cache.stats()
+
+@router.get("/events")
+def get_event_metrics(current_user = Depends(get_optional_current_user)):
+    """Open change event streams and published batches for this worker process"""
+    return events.broker.stats()
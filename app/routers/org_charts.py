@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app import models, schemas
-from app.database import get_db
+from app.database import SessionLocal, get_db
+from app.replicas import get_read_db, stream_session_factory
+from app.cache import stats_cache
+from app.changes import record_org_chart_change, record_org_change, select_changes
+from app.conditional import conditional_response, org_etag
 from app.auth import get_optional_current_user, has_permission
+from app.hierarchy import get_org_stats
+from app.jobs import create_job, run_job
+from app.pagination import set_next_cursor, stream_ndjson
+from app.serialization import rows_response
 
 router = APIRouter()
 
@@ -14,6 +24,35 @@ def get_org_chart(db: Session, org_id: int):
         raise HTTPException(status_code=404, detail="Organization chart not found")
     return org_chart
 
+def delete_org_rows(db: Session, org_id: int):
+    """Delete an org chart and all of its employees with set-based statements (does not commit)"""
+    # A single statement removes every employee at once. The self-referencing manager_id
+    # constraint is checked at the end of the statement, when managers and reports are both gone
+    db.execute(
+        delete(models.Employee)
+        .where(models.Employee.org_id == org_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(models.OrgChart)
+        .where(models.OrgChart.id == org_id)
+        .execution_options(synchronize_session=False)
+    )
+    # Drop any now-deleted objects this session still holds
+    db.expire_all()
+    record_org_change(db, org_id)
+    # One entry for the whole org; consumers drop its employees along with it
+    record_org_chart_change(db, org_id, deleted=True)
+
+def delete_org_chart_job(org_id: int):
+    """Background job body: delete an org chart in its own session"""
+    db = SessionLocal()
+    try:
+        delete_org_rows(db, org_id)
+        db.commit()
+    finally:
+        db.close()
+
 @router.post("/", response_model=schemas.OrgChart, dependencies=[Depends(has_permission(["create_org_chart"]))])
 def create_org_chart(
     org_chart: schemas.OrgChartCreate, 
@@ -23,29 +62,103 @@ def create_org_chart(
     """Create a new organization chart"""
     db_org_chart = models.OrgChart(**org_chart.model_dump())
     db.add(db_org_chart)
+    db.flush()
+    record_org_change(db, db_org_chart.id)
+    record_org_chart_change(db, db_org_chart.id)
     db.commit()
     db.refresh(db_org_chart)
     return db_org_chart
 
 @router.get("/", response_model=List[schemas.OrgChart])
 def list_org_charts(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: only return org charts with a greater id (preferred over skip)"),
+    stream: bool = Query(False, description="Stream every org chart as NDJSON"),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """List all organization charts"""
-    org_charts = db.query(models.OrgChart).offset(skip).limit(limit).all()
-    return org_charts
+    """
+    List organization charts ordered by id.
+    Page with ``after_id`` (the next cursor is returned in the X-Next-Cursor header),
+    or set ``stream`` to receive all org charts as NDJSON.
+    """
+    filters = []
+    if after_id is not None:
+        filters.append(models.OrgChart.id > after_id)
+    
+    statement = select(models.OrgChart.id, models.OrgChart.name, models.OrgChart.version).where(*filters).order_by(models.OrgChart.id)
+    if stream:
+        return stream_ndjson(statement, stream_session_factory(db))
+    
+    org_charts = db.execute(statement.offset(skip).limit(limit)).all()
+    set_next_cursor(response, org_charts, limit)
+    return rows_response(org_charts, schemas.OrgChart, response)
 
 @router.get("/{org_id}", response_model=schemas.OrgChart)
 def get_org_chart_by_id(
     org_id: int, 
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_optional_current_user)
 ):
-    """Get an org chart by ID"""
-    return get_org_chart(db, org_id)
+    """Get an org chart by ID. Honors If-None-Match against the org's version ETag."""
+    db_org_chart = get_org_chart(db, org_id)
+    not_modified = conditional_response(request, response, org_etag(org_id, db_org_chart.version))
+    if not_modified is not None:
+        return not_modified
+    return db_org_chart
+
+@router.get("/{org_id}/stats", response_model=schemas.OrgStats)
+def get_org_chart_stats(
+    org_id: int, 
+    request: Request,
+    response: Response,
+    include_spans: bool = Query(False, description="Include the number of direct reports of every manager"),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Headcount, depth distribution, leaf count and span of control, aggregated in the database.
+    Results are cached per org version and honor If-None-Match.
+    """
+    db_org_chart = get_org_chart(db, org_id)
+    not_modified = conditional_response(request, response, org_etag(org_id, db_org_chart.version))
+    if not_modified is not None:
+        return not_modified
+    
+    key = (org_id, db_org_chart.version)
+    stats = stats_cache.get(key)
+    if stats is None:
+        stats = get_org_stats(db, org_id)
+        stats_cache.set(key, stats)
+    
+    return {
+        **stats,
+        "org_id": org_id,
+        "version": db_org_chart.version,
+        "spans": stats["spans"] if include_spans else None,
+    }
+
+@router.get("/{org_id}/changes", response_model=List[schemas.OrgChange])
+def get_org_chart_changes(
+    org_id: int, 
+    response: Response,
+    since: int = Query(0, ge=0, description="Only changes with a greater sequence number"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_optional_current_user)
+):
+    """
+    Changes to an org chart and its employees after ``since``, in commit order.
+    Apply them in order and resume from the last ``seq`` (also sent in X-Next-Cursor when the page is full).
+    A deleted org chart's feed ends with its delete entry, so this does not 404 for deleted orgs.
+    """
+    changes = db.execute(select_changes(since, limit, org_id)).all()
+    set_next_cursor(response, changes, limit, key="seq")
+    return rows_response(changes, schemas.OrgChange, response)
 
 @router.put("/{org_id}", response_model=schemas.OrgChart, dependencies=[Depends(has_permission(["update_org_chart"]))])
 def update_org_chart(
@@ -60,6 +173,8 @@ def update_org_chart(
     # Update the org chart name
     db_org_chart.name = org_chart.name
     
+    record_org_change(db, org_id)
+    record_org_chart_change(db, org_id)
     db.commit()
     db.refresh(db_org_chart)
     return db_org_chart
@@ -67,21 +182,24 @@ def update_org_chart(
 @router.delete("/{org_id}", dependencies=[Depends(has_permission(["delete_org_chart"]))])
 def delete_org_chart(
     org_id: int, 
+    background_tasks: BackgroundTasks,
+    background: bool = Query(False, description="Delete in a background job and return 202 with its id"),
     db: Session = Depends(get_db),
     current_user = Depends(get_optional_current_user)
 ):
     """Delete an org chart and all its employees"""
-    db_org_chart = get_org_chart(db, org_id)
-    
-    # Check if the org chart has any employees
-    employees = db.query(models.Employee).filter(models.Employee.org_id == org_id).all()
+    get_org_chart(db, org_id)
     
-    # Delete all employees first to handle foreign key constraints properly
-    for employee in employees:
-        db.delete(employee)
+    # Very large orgs can be deleted off the request worker; poll /jobs/{job_id} for the outcome
+    if background:
+        job = create_job(db, "delete_org_chart")
+        background_tasks.add_task(run_job, job.id, delete_org_chart_job, org_id)
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Organization chart deletion started", "job_id": job.id}
+        )
     
-    # Delete the org chart
-    db.delete(db_org_chart)
+    delete_org_rows(db, org_id)
     db.commit()
     
     return {"message": "Organization chart deleted successfully"} 
\ No newline at end of file
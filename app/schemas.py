@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List, Dict, Tuple, Union, Literal
 
 class OrgChartBase(BaseModel):
     name: str
@@ -9,6 +10,7 @@ class OrgChartCreate(OrgChartBase):
 
 class OrgChart(OrgChartBase):
     id: int
+    version: int = 0
 
     class Config:
         from_attributes = True
@@ -28,6 +30,9 @@ class Employee(EmployeeBase):
     class Config:
         from_attributes = True
 
+class EmployeeSearchResult(Employee):
+    score: float
+
 class EmployeeWithReports(Employee):
     direct_reports: List['EmployeeWithReports'] = []
 
@@ -38,4 +43,141 @@ class EmployeePromote(BaseModel):
     new_ceo_id: int
 
 class AssignManagerRequest(BaseModel):
-    employee_ids: List[int] 
\ No newline at end of file
+    employee_ids: List[int] 
+
+class EmployeeChainRequest(BaseModel):
+    employee_ids: List[int] = Field(..., max_length=1000)
+
+class EmployeeLookupRequest(BaseModel):
+    employee_ids: List[int] = Field(..., max_length=1000)
+
+class EmployeeLookupResult(BaseModel):
+    # Found employees, in request order
+    employees: List[Employee]
+    not_found: List[int]
+    # Ids of employees that exist but belong to another organization
+    not_in_organization: List[int]
+
+class EmployeeChain(BaseModel):
+    employee_id: int
+    # Managers from the nearest up to the CEO
+    chain: List[Employee]
+
+class CommonManagerRequest(BaseModel):
+    employee_ids: List[int] = Field(..., min_length=2, max_length=1000)
+
+class ReportingPath(BaseModel):
+    from_id: int
+    to_id: int
+    common_manager: Employee
+    # From from_id up to the common manager and down to to_id, both ends included
+    path: List[Employee]
+
+class ReportingPathsRequest(BaseModel):
+    pairs: List[Tuple[int, int]] = Field(..., max_length=1000)
+
+class SubtreeMove(BaseModel):
+    employee_id: int
+    manager_id: int
+
+class SubtreeMoveRequest(BaseModel):
+    moves: List[SubtreeMove] = Field(..., min_length=1, max_length=1000)
+
+class BatchCreate(EmployeeCreate):
+    op: Literal["create"]
+    # Client-side reference, usable as manager_key by later operations in the batch
+    key: Optional[str] = None
+    manager_key: Optional[str] = None
+
+class BatchUpdate(EmployeeCreate):
+    op: Literal["update"]
+    employee_id: int
+    manager_key: Optional[str] = None
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    employee_id: int
+
+class BatchPromote(BaseModel):
+    op: Literal["promote"]
+    employee_id: int
+
+class BatchAssignManager(AssignManagerRequest):
+    op: Literal["assign_manager"]
+    employee_id: int
+
+class BatchMove(SubtreeMoveRequest):
+    op: Literal["move"]
+
+BatchOperation = Annotated[
+    Union[BatchCreate, BatchUpdate, BatchDelete, BatchPromote, BatchAssignManager, BatchMove],
+    Field(discriminator="op")
+]
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=1000)
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: str
+    # Employees the operation created or changed, as they are after the whole batch
+    employees: List[Employee]
+
+class EmployeeImportRecord(BaseModel):
+    key: str
+    name: str
+    title: str
+    manager_key: Optional[str] = None
+    manager_id: Optional[int] = None
+
+class EmployeeImportRequest(BaseModel):
+    employees: List[EmployeeImportRecord]
+
+class EmployeeImportResult(BaseModel):
+    created: int
+    ids: Dict[str, int]
+
+class DepthHeadcount(BaseModel):
+    depth: int
+    headcount: int
+
+class ManagerSpan(BaseModel):
+    manager_id: int
+    direct_reports: int
+
+class OrgStats(BaseModel):
+    org_id: int
+    version: int
+    headcount: int
+    max_depth: Optional[int] = None
+    leaf_count: int
+    manager_count: int
+    average_span_of_control: float
+    max_span_of_control: int
+    headcount_by_depth: List[DepthHeadcount]
+    spans: Optional[List[ManagerSpan]] = None
+
+class SubtreeHeadcount(BaseModel):
+    employee_id: int
+    org_id: int
+    # The employee plus everyone reporting to them, directly or indirectly
+    headcount: int
+
+class OrgChange(BaseModel):
+    seq: int
+    org_id: int
+    # "org_chart" or "employee"
+    entity: str
+    entity_id: int
+    # "upsert" (fields hold the committed values) or "delete"
+    action: str
+    name: Optional[str] = None
+    title: Optional[str] = None
+    manager_id: Optional[int] = None
+    changed_at: datetime
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    detail: Optional[str] = None
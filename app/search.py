@@ -0,0 +1,75 @@
+from sqlalchemy import case, column, func, or_, select, table, text
+from sqlalchemy.orm import Session
+from typing import List
+from app import models
+
+# Shorter queries have no trigrams and fall back to prefix matching
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+# Extra score for a match at the start of the name or title
+NAME_PREFIX_BONUS = 1.0
+TITLE_PREFIX_BONUS = 0.5
+
+# FTS5 trigram table maintained by the triggers in app.models (SQLite only)
+employees_search = table("employees_search", column("rowid"), column("rank"))
+
+def _prefix_bonus(q: str):
+    return case(
+        (models.Employee.name.istartswith(q, autoescape=True), NAME_PREFIX_BONUS),
+        (models.Employee.title.istartswith(q, autoescape=True), TITLE_PREFIX_BONUS),
+        else_=0.0,
+    )
+
+def starts_with(expression, q: str, dialect: str):
+    """Index-friendly prefix test of an already lowercased expression"""
+    if dialect == "postgresql" or not q:
+        return expression.startswith(q, autoescape=True)
+    # SQLite only uses an expression index for range comparisons, not for LIKE
+    return (expression >= q) & (expression < q[:-1] + chr(ord(q[-1]) + 1))
+
+def _fts_match_expression(q: str) -> str:
+    """OR of the query's trigrams, so near misses still match and bm25 ranks them"""
+    trigrams = dict.fromkeys(q[i:i + 3] for i in range(len(q) - 2))
+    return " OR ".join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+
+def search_employees(db: Session, org_id: int, q: str, skip: int = 0, limit: int = 20) -> List:
+    """
+    Rank employees of an org whose name or title matches ``q``, best first.
+    Prefix matches score highest; otherwise PostgreSQL uses pg_trgm substring
+    and similarity matching, and SQLite the FTS5 trigram table with bm25.
+    Returns rows of the employee columns plus ``score``.
+    """
+    q = q.strip().lower()
+    dialect = db.get_bind().dialect.name
+    name, title = models.Employee.name, models.Employee.title
+    statement = select(*models.EMPLOYEE_COLUMNS).where(models.Employee.org_id == org_id)
+    
+    if len(q) < MIN_TRIGRAM_QUERY_LENGTH:
+        # Served by the (org_id, lower(name)) and (org_id, lower(title)) indexes
+        score = _prefix_bonus(q)
+        statement = statement.where(
+            or_(starts_with(func.lower(name), q, dialect), starts_with(func.lower(title), q, dialect))
+        )
+    elif dialect == "postgresql":
+        # Both the substring and the similarity (%) operators use the (org_id, trigram) GIN indexes
+        score = _prefix_bonus(q) + func.greatest(func.similarity(name, q), func.similarity(title, q))
+        statement = statement.where(
+            or_(
+                name.icontains(q, autoescape=True),
+                title.icontains(q, autoescape=True),
+                name.op("%")(q),
+                title.op("%")(q),
+            )
+        )
+    else:
+        # bm25 ranks are negative, lower being better
+        score = _prefix_bonus(q) - employees_search.c.rank
+        statement = (
+            statement
+            .join(employees_search, employees_search.c.rowid == models.Employee.id)
+            .where(text("employees_search MATCH :match").bindparams(match=_fts_match_expression(q)))
+        )
+    
+    score = score.label("score")
+    statement = statement.add_columns(score).order_by(score.desc(), models.Employee.id)
+    return db.execute(statement.offset(skip).limit(limit)).all()
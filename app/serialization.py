@@ -0,0 +1,51 @@
+import json
+from datetime import date
+from operator import attrgetter
+from typing import Any, Iterable, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _encode_date(value: Any) -> str:
+    # ISO 8601, as orjson and Pydantic write dates and datetimes
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(value: Any) -> bytes:
+    """Encode to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), default=_encode_date).encode()
+
+class FastJSONResponse(Response):
+    """JSON response whose body is encoded without Pydantic validation"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+def row_dicts(rows: Iterable, model: Type[BaseModel]) -> List[dict]:
+    """
+    Map plain rows (column tuples, namedtuples or objects) onto dicts shaped like
+    ``model``, skipping per-row validation. Rows must already hold the model's
+    field values with JSON-native types (or dates and datetimes).
+    """
+    fields = tuple(model.model_fields)
+    getter = attrgetter(*fields)
+    return [dict(zip(fields, getter(row))) for row in rows]
+
+def rows_response(rows: Iterable, model: Type[BaseModel], response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Serialize plain rows as a JSON list shaped like ``model`` (see row_dicts).
+    Headers set on the endpoint's injected ``response`` are carried over.
+    """
+    body = dumps(row_dicts(rows, model))
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(body, headers=headers)
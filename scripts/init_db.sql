@@ -4,10 +4,15 @@ CREATE DATABASE orgchart;
 -- Connect to the database
 \c orgchart;
 
+-- Trigram operators for employee search, and btree operators to lead those GIN indexes with org_id
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 -- Create tables
 CREATE TABLE org_charts (
     id SERIAL PRIMARY KEY,
-    name VARCHAR(255) NOT NULL
+    name VARCHAR(255) NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE employees (
@@ -15,12 +20,44 @@ CREATE TABLE employees (
     name VARCHAR(255) NOT NULL,
     title VARCHAR(255) NOT NULL,
     org_id INTEGER NOT NULL REFERENCES org_charts(id) ON DELETE CASCADE,
-    manager_id INTEGER REFERENCES employees(id) ON DELETE SET NULL
+    manager_id INTEGER REFERENCES employees(id) ON DELETE SET NULL,
+    path TEXT,
+    depth INTEGER
+);
+
+-- Append-only change feed (no foreign key, so entries outlive deleted orgs)
+CREATE TABLE org_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    org_id INTEGER NOT NULL,
+    entity VARCHAR NOT NULL,
+    entity_id INTEGER NOT NULL,
+    action VARCHAR NOT NULL,
+    name VARCHAR,
+    title VARCHAR,
+    manager_id INTEGER,
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Background job status, shared by every API worker
+CREATE TABLE jobs (
+    id VARCHAR PRIMARY KEY,
+    kind VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    detail VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
 );
 
 -- Create indexes for performance
-CREATE INDEX ix_employees_org_id ON employees(org_id);
+CREATE INDEX ix_employees_org_id_id ON employees(org_id, id);
 CREATE INDEX ix_employees_manager_id ON employees(manager_id);
+CREATE INDEX ix_employees_org_id_path ON employees(org_id, path text_pattern_ops);
+CREATE INDEX ix_employees_org_id_depth_id ON employees(org_id, depth, id);
+CREATE INDEX ix_employees_org_id_name_trgm ON employees USING gin (org_id, name gin_trgm_ops);
+CREATE INDEX ix_employees_org_id_title_trgm ON employees USING gin (org_id, title gin_trgm_ops);
+CREATE INDEX ix_employees_org_id_name_lower ON employees(org_id, lower(name) text_pattern_ops);
+CREATE INDEX ix_employees_org_id_title_lower ON employees(org_id, lower(title) text_pattern_ops);
+CREATE INDEX ix_org_changes_org_id_seq ON org_changes(org_id, seq);
 
 -- Grant permissions (if needed)
 -- GRANT ALL PRIVILEGES ON DATABASE orgchart TO postgres;
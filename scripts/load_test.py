@@ -0,0 +1,94 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import subprocess
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_server(port, use_async_db):
+    """Start uvicorn for one stack in a subprocess"""
+    env = dict(os.environ, USE_ASYNC_DB="true" if use_async_db else "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+
+def wait_until_ready(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/openapi.json").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout} seconds")
+
+async def run_load(url, concurrency, total_requests):
+    """Issue total_requests GETs with ``concurrency`` in flight; returns (elapsed, latencies, errors)"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(total_requests))
+
+    async def worker(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, errors
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare throughput and latency of the sync and async database stacks.')
+    parser.add_argument('--org-id', type=int, default=1, help='Organization to query')
+    parser.add_argument('--path', default='/orgcharts/{org_id}/employees/?limit=50', help='Request path template')
+    parser.add_argument('--concurrency', type=int, default=200, help='Requests in flight at once')
+    parser.add_argument('--requests', type=int, default=5000, help='Total requests per stack')
+    parser.add_argument('--port', type=int, default=8765, help='Port used for the temporary servers')
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    url = base_url + args.path.format(org_id=args.org_id)
+    print(f"GET {args.path.format(org_id=args.org_id)} x {args.requests} at concurrency {args.concurrency}")
+    print(f"{'stack':>6} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'errors':>8}")
+
+    for use_async_db in (False, True):
+        server = start_server(args.port, use_async_db)
+        try:
+            wait_until_ready(base_url)
+            # Warm up connection pools before measuring
+            asyncio.run(run_load(url, min(args.concurrency, 20), 100))
+            elapsed, latencies, errors = asyncio.run(run_load(url, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+        name = "async" if use_async_db else "sync"
+        print(f"{name:>6} {len(latencies) / elapsed:>10.1f} {percentile(latencies, 0.5) * 1000:>10.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>10.1f} {errors:>8}")
+
+if __name__ == "__main__":
+    main()
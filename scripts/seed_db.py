@@ -11,6 +11,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models import OrgChart, Employee
 from app.database import Base
+from app.hierarchy import rebuild_paths
 from dotenv import load_dotenv
 import traceback
 
@@ -202,6 +203,11 @@ def main():
             
             print(f"Created {total_created} org charts ({rate:.1f} orgs/sec) - {(total_created/num_orgs*100):.1f}% complete")
         
+        # Build the materialized hierarchy paths for the seeded employees
+        print("Building hierarchy paths...")
+        rebuild_paths(session)
+        session.commit()
+        
         print(f"Successfully created {total_created} out of {num_orgs} org charts")
         print(f"Total time: {time.time() - start_time:.2f} seconds")
         